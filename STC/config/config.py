@@ -96,7 +96,8 @@ class ConfigXLHierarchy(Config):
             temp_folder=self.data[cfg]['temp_folder'],
             file_name_prefix=self.data[cfg]['file_name_prefix'],
             file_name_postfix=self.data[cfg]['file_name_postfix'],
-            file_name_extension=self.data[cfg]['file_name_extension']
+            file_name_extension=self.data[cfg]['file_name_extension'],
+            writer=self.data[cfg].get('writer', 'xlwings')
         )
 
     def initExcelHierarchyForDocuments(self):
@@ -134,7 +135,11 @@ class ConfigXLHierarchy(Config):
             doc_type_col_start=int(self.data[cfg]['doc_type_col_start']),
             file_name_extension=str(self.data[cfg]['file_name_extension']),
             primary_application_col=int(self.data[cfg]['primary_application_col']),
-            product_type_exceptions=str(self.data[cfg]['product_type_exceptions']).replace(" ", "").split(',')
+            product_type_exceptions=str(self.data[cfg]['product_type_exceptions']).replace(" ", "").split(','),
+            writer=self.data[cfg].get('writer', 'xlwings'),
+            workers=int(self.data[cfg].get('workers', '0')),
+            queue_size=int(self.data[cfg].get('queue_size', '0')),
+            cache_folder=self.data[cfg].get('cache_folder', 'cache')
         )
 
     def initExcelHierarchyNorm(self):
@@ -151,7 +156,8 @@ class ConfigXLHierarchy(Config):
             export_file_path=self.data[cfg]['export_file_path'],
             file_name_prefix=self.data[cfg]['file_name_prefix'],
             file_name_postfix=self.data[cfg]['file_name_postfix'],
-            file_name_extension=self.data[cfg]['file_name_extension']
+            file_name_extension=self.data[cfg]['file_name_extension'],
+            writer=self.data[cfg].get('writer', 'xlwings')
         )
 
 
@@ -391,6 +397,7 @@ class ConfigDb(Config):
             db_type=self.data[cfg]['db_type'],
             folder=self.data[cfg]['folder'],
             file_name=self.data[cfg]['file_name'],
+            tree_levels=int(self.data[cfg].get('tree_levels', '0')),
         )
 
     def initDbSQLite(self):
@@ -424,6 +431,8 @@ class ConfigPLM(Config):
         return CfgPLM(
             folder_kd=self.data[cfg]['folder_kd'],
             folder_td=self.data[cfg]['folder_td'],
+            workers=int(self.data[cfg].get('workers', '0')),
+            cache_file=self.data[cfg].get('cache_file', 'PLM_cache.db'),
         )
 
 
@@ -490,6 +499,10 @@ class CfgXLHierarchyForDocuments:
     file_name_extension: str
     primary_application_col: int
     product_type_exceptions: list[str]
+    writer: str  # xlwings (через Excel) или openpyxl (без запуска Excel)
+    workers: int  # процессов для считывания таблиц (0 - по числу ядер)
+    queue_size: int  # таблиц, считываемых наперед (0 - по 2 на процесс)
+    cache_folder: str  # кэш считанных таблиц (по хэшу содержимого файла)
 
 
 @dataclass
@@ -535,6 +548,7 @@ class CfgXLHierarchyNorm:
     file_name_prefix: str
     file_name_postfix: str
     file_name_extension: str
+    writer: str  # xlwings (через Excel) или openpyxl (без запуска Excel)
 
 
 @dataclass
@@ -553,6 +567,7 @@ class CfgXLHierarchyNTD:
     file_name_prefix: str
     file_name_postfix: str
     file_name_extension: str
+    writer: str  # xlwings (через Excel) или openpyxl (без запуска Excel)
 
 
 @dataclass
@@ -742,6 +757,7 @@ class CfgDbMain:
     db_type: str
     folder: str
     file_name: str
+    tree_levels: int  # уровней древа, загружаемых при открытии (0 - все уровни)
 
 
 @dataclass
@@ -767,6 +783,8 @@ class CfgPLM:
 
     folder_kd: str
     folder_td: str
+    workers: int  # процессов для считывания выгрузок (0 - по числу ядер)
+    cache_file: str  # манифест и кэш считанных выгрузок (SQLite)
 
 
 CONFIG = ConfigMain()
@@ -5,7 +5,7 @@ from os import path
 from pandas import read_excel
 
 from STC.config.config import CONFIG
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 
 
 def add_default_data(engine) -> None:
@@ -119,8 +119,8 @@ def insert_data(sheet_name, index_label, first_row, type_table_file, engine):
     """Заполняет функцию данными по-умолчанию из файла excel"""
 
     default = 'Заполнение значений по умолчанию для'
-    SplashScreen().newMessage(message=f'{default} {sheet_name}',
-                              hide_pb=True)
+    PROGRESS.newMessage(message=f'{default} {sheet_name}',
+                        hide_pb=True)
     type_table = read_excel(type_table_file, sheet_name=sheet_name)
     type_table[first_row:].to_sql(sheet_name,
                                   con=engine,
@@ -12,7 +12,8 @@ from STC.database.database import DbDocumentType
 from STC.database.database import DbConnection
 from STC.database.database import DbExcelProject
 from STC.database.database import DbHierarchy
-from STC.gui.splash_screen import SplashScreen
+from STC.database.database import DbHierarchyClosure
+from STC.progress.progress import PROGRESS
 from STC.functions.func import benchmark
 
 
@@ -24,52 +25,52 @@ def generate_test_data() -> None:
     stages = 9
     stage = 0
     stage += 1
-    SplashScreen().newMessage(message='Генерация изделий',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Генерация изделий',
+                        stage=stage,
+                        stages=stages)
     generate_products(product_quantity=product_quantity)
 
     stage += 1
-    SplashScreen().newMessage(message='Генерация проектов',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Генерация проектов',
+                        stage=stage,
+                        stages=stages)
     generate_projects(project_quantity=project_quantity,
                       max_lvl=max_lvl)
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение изделий в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение изделий в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_products()
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение проектов в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение проектов в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_projects()
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение связей изделий в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение связей изделий в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_hierarchies()
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение первичных применяемостей в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение первичных применяемостей в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_primary_application()
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение документов в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение документов в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_documents_real()
 
     stage += 1
-    SplashScreen().newMessage(message='Внесение связей документов с изделиями в БД',
-                              stage=stage,
-                              stages=stages)
+    PROGRESS.newMessage(message='Внесение связей документов с изделиями в БД',
+                        stage=stage,
+                        stages=stages)
     db_add_documents()
     DbConnection.updAllData()
 
@@ -78,14 +79,14 @@ def generate_test_data() -> None:
 def generate_products(product_quantity: int) -> None:
     """ Генерация изделий """
 
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=product_quantity)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=product_quantity)
     for i in range(product_quantity):
-        SplashScreen().changeSubProgressBar(stage=i,
-                                            stages=product_quantity)
+        PROGRESS.changeSubProgressBar(stage=i,
+                                      stages=product_quantity)
         ProductChild.createProduct()
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
@@ -93,23 +94,23 @@ def generate_projects(project_quantity, max_lvl) -> None:
     """ Генерирует проекты, представляющие собой
         древа изделий """
 
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=project_quantity)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=project_quantity)
     for num in range(project_quantity):
-        SplashScreen().changeSubProgressBar(stage=num,
-                                            stages=project_quantity)
+        PROGRESS.changeSubProgressBar(stage=num,
+                                      stages=project_quantity)
         Project(name=f'_Проект {num}',
                 max_lvl=max_lvl)
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_products():
     """ Вносит изделия в БД """
     stages = 4
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
     products_dict = {}
     for product in Product.products.values():
         product_dict = {'name': str(product.name),
@@ -118,25 +119,25 @@ def db_add_products():
                         }
         products_dict[product.deno] = product_dict
 
-    SplashScreen().changeSubProgressBar(stage=2,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=2,
+                                  stages=stages)
     products_dict = DbProduct.addDbProducts(products=products_dict,
                                             in_cache=True)
 
-    SplashScreen().changeSubProgressBar(stage=3,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=3,
+                                  stages=stages)
     for deno, product_dict in products_dict.items():
         Product.products[deno].db_product = product_dict['db_product']
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_projects():
     """ Вносит проекты в БД """
     stages = 3
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
 
     projects_dict = {}
     for project in Project.projects.values():
@@ -144,19 +145,19 @@ def db_add_projects():
                         'product': project.main_product.db_product}
         projects_dict[project.name] = project_dict
 
-    SplashScreen().changeSubProgressBar(stage=2,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=2,
+                                  stages=stages)
     DbExcelProject.addDbProjects(projects=projects_dict)
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_hierarchies():
     """ Вносит в БД данные родитель - дети для изделий """
     stages = len(Product.products.values()) + 2
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
     for num, product in enumerate(Product.products.values()):
         for child in product.children:
             hierarchy = DbHierarchy(
@@ -166,38 +167,39 @@ def db_add_hierarchies():
                 quantity=child.quantity,
                 unit='шт')
             DbConnection.session.add(hierarchy)
-        SplashScreen().changeSubProgressBar(stage=num,
-                                            stages=stages)
+        PROGRESS.changeSubProgressBar(stage=num,
+                                      stages=stages)
     DbConnection.sessionCommit()
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    DbHierarchyClosure.rebuild()
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_primary_application():
     """ Вносит первичные применяемости в БД """
     stages = len(Product.products.values()) + 2
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
     for num, product in enumerate(Product.products.values()):
         if product.primary_parent is not None:
             primary_application = DbPrimaryApplication(
                 id_child=product.db_product.id_product,
                 id_parent=product.primary_parent.db_product.id_product)
             DbConnection.session.add(primary_application)
-        SplashScreen().changeSubProgressBar(stage=num,
-                                            stages=stages)
+        PROGRESS.changeSubProgressBar(stage=num,
+                                      stages=stages)
     DbConnection.sessionCommit()
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_documents_real():
     """ Вносит реквизиты документов в БД """
     stages = len(Product.products.values()) + 2
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
     for num, product in enumerate(Product.products.values()):
         for document in product.documents:
             document.db_document_real = \
@@ -212,30 +214,30 @@ def db_add_documents_real():
                                date_changed=document.date_changed,
                                name_changed=document.name_changed)
             DbConnection.session.add(document.db_document_real)
-        SplashScreen().changeSubProgressBar(stage=num,
-                                            stages=stages)
+        PROGRESS.changeSubProgressBar(stage=num,
+                                      stages=stages)
     DbConnection.sessionCommit()
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 @benchmark
 def db_add_documents():
     """ Вносит в БД связи изделие - документ"""
     stages = len(Product.products.values()) + 2
-    SplashScreen().changeSubProgressBar(stage=1,
-                                        stages=stages)
+    PROGRESS.changeSubProgressBar(stage=1,
+                                  stages=stages)
     for num, product in enumerate(Product.products.values()):
         for document in product.documents:
             document.db_document = \
                 DbDocument(id_product=document.product.db_product.id_product,
                            id_document_real=document.db_document_real.id_document_real)
             DbConnection.session.add(document.db_document)
-        SplashScreen().changeSubProgressBar(stage=num,
-                                            stages=stages)
+        PROGRESS.changeSubProgressBar(stage=num,
+                                      stages=stages)
     DbConnection.sessionCommit()
-    SplashScreen().changeSubProgressBar(stage=0,
-                                        stages=0)
+    PROGRESS.changeSubProgressBar(stage=0,
+                                  stages=0)
 
 
 class Project:
@@ -567,6 +569,7 @@ class Document:
     # pylint: disable=too-many-instance-attributes
     def __init__(self, product: Product, id_type: int):
         self.product = product
+        DbDocumentType.updCheck()
         self.db_type = DbDocumentType.data.get(id_type, None)
         self.deno = self.getDeno()
         self.name = self.getName()
@@ -0,0 +1,140 @@
+""" Пакетная выгрузка иерархических составов нескольких изделий в Excel.
+
+    Древо каждого изделия строится из данных HierarchicalTree без модели Qt,
+    выгрузки выполняются в пуле процессов, каждый процесс работает
+    со своей сессией БД только для чтения.
+
+    python -m STC.excel.xl_export.batch УИЕС.123456.001 УИЕС.123456.002 --kind norm
+    python -m STC.excel.xl_export.batch --projects --kind doc --workers 4 """
+
+from __future__ import annotations
+import argparse
+import logging
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from time import perf_counter
+
+from STC.database.database import DbExcelProject
+from STC.excel.xl_export.hierarchy import Excel
+from STC.excel.xl_export.hierarchy import ExcelNorm
+from STC.excel.xl_export.hierarchy import ExcelNTD
+from STC.product.hierarchical_tree import HierarchicalTree
+from STC.product.product import Connection
+
+
+EXPORT_KINDS = {'doc': (Excel, {}),
+                'full': (Excel, {'full': True}),
+                'norm': (ExcelNorm, {}),
+                'ntd': (ExcelNTD, {})}
+
+
+@dataclass
+class BatchResult:
+    """ Результат выгрузки одного изделия """
+
+    deno: str
+    tree_time: float = 0.0
+    export_time: float = 0.0
+    file_name: str = ''
+    error: str = ''
+
+
+def init_worker() -> None:
+    """ Подключение процесса пула к БД только для чтения """
+    Connection(read_only=True)
+
+
+def export_product(deno: str, kind: str, writer: str) -> BatchResult:
+    """ Построение древа изделия и его выгрузка в Excel """
+    result = BatchResult(deno=deno)
+    start = perf_counter()
+    try:
+        tree = HierarchicalTree(product_denotation=deno)
+        result.tree_time = perf_counter() - start
+        export_cls, options = EXPORT_KINDS[kind]
+        start = perf_counter()
+        export = export_cls(tree, writer=writer, interactive=False, **options)
+        result.export_time = perf_counter() - start
+        result.file_name = export.wb_new
+    except Exception as error:  # pylint: disable=broad-except
+        logging.exception(f'Не удалось выгрузить {deno}')
+        result.error = f'{type(error).__name__}: {error}'
+    return result
+
+
+def project_denos() -> list[str]:
+    """ Обозначения изделий - корней проектов иерархических таблиц """
+    Connection(read_only=True)
+    return sorted({project.product.deno for project in DbExcelProject.uniqueData()
+                   if project.product is not None})
+
+
+def export_batch(denos: list[str], kind: str = 'doc',
+                 workers: int | None = None,
+                 writer: str = 'openpyxl') -> list[BatchResult]:
+    """ Выгрузка списка изделий в пуле процессов.
+        Результаты возвращаются в порядке списка изделий """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = {executor.submit(export_product, deno, kind, writer): deno
+                   for deno in denos}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = result.error or result.file_name
+            logging.info(f'{result.deno}: {result.tree_time + result.export_time:.1f} с {status}')
+    return [results[deno] for deno in denos]
+
+
+def timing_summary(results: list[BatchResult], total: float) -> str:
+    """ Таблица времени выгрузки изделий """
+    width = max([len(result.deno) for result in results] + [len('Изделие')])
+    lines = [f'{"Изделие":<{width}}  {"Древо, с":>9}  {"Выгрузка, с":>11}  Результат']
+    for result in results:
+        lines.append(f'{result.deno:<{width}}  '
+                     f'{result.tree_time:>9.2f}  '
+                     f'{result.export_time:>11.2f}  '
+                     f'{result.error or result.file_name}')
+    failed = sum(1 for result in results if result.error)
+    lines.append(f'Изделий: {len(results)}, ошибок: {failed}, всего {total:.2f} с')
+    return '\n'.join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ Разбор аргументов командной строки и запуск пакетной выгрузки """
+    parser = argparse.ArgumentParser(
+        prog='python -m STC.excel.xl_export.batch',
+        description='Пакетная выгрузка иерархических составов в Excel')
+    parser.add_argument('denos', nargs='*',
+                        help='обозначения изделий')
+    parser.add_argument('--projects', action='store_true',
+                        help='выгрузить корневые изделия всех проектов')
+    parser.add_argument('--kind', choices=EXPORT_KINDS, default='doc',
+                        help='вид выгрузки')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов')
+    parser.add_argument('--writer', choices=('openpyxl', 'xlwings'), default='openpyxl',
+                        help='средство записи книг Excel')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    denos = list(dict.fromkeys(args.denos))
+    if args.projects:
+        denos.extend(deno for deno in project_denos() if deno not in denos)
+    if not denos:
+        parser.error('не указаны изделия для выгрузки')
+
+    start = perf_counter()
+    results = export_batch(denos=denos,
+                           kind=args.kind,
+                           workers=args.workers,
+                           writer=args.writer)
+    print(timing_summary(results=results, total=perf_counter() - start))
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
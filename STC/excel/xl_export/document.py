@@ -10,7 +10,7 @@ from openpyxl.styles import Alignment
 
 from STC.config.config import CFG_MK
 from STC.functions.func import text_slicer
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 
 if TYPE_CHECKING:
     from STC.product.product import Product
@@ -61,29 +61,29 @@ class ExcelDocumentCreator:
         self.template.n_contr = self.document.name_n_contr
         # self.template.m_contr = self.document.name_m_contr
         self.template.litera = self.document.litera
-        SplashScreen().newMessage(message='Расчет первой страницы',
-                                  stage=1,
-                                  stages=4,
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Расчет первой страницы',
+                            stage=1,
+                            stages=4,
+                            log=True,
+                            logging_level='INFO')
         self.createFirstPage()
-        SplashScreen().newMessage(message='Расчет текста операций',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Расчет текста операций',
+                            log=True,
+                            logging_level='INFO')
         self.createOperationText()
-        SplashScreen().newMessage(message='Расчет страницы входящих',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Расчет страницы входящих',
+                            log=True,
+                            logging_level='INFO')
         self.createChildrenPage()
-        SplashScreen().newMessage(message='Экспорт в Excel',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Экспорт в Excel',
+                            log=True,
+                            logging_level='INFO')
         self.template.exportEText()
 
         wb_name = self.template.save(name=self.file_name)
 
-        SplashScreen().closeWithWindow(msg=f'Документ сохранен как:\n{wb_name}',
-                                       m_type='info')
+        PROGRESS.closeWithWindow(msg=f'Документ сохранен как:\n{wb_name}',
+                                 m_type='info')
 
     def createFirstPage(self) -> None:
         """ Генерация общих данных и их расположения в документе """
@@ -4,24 +4,27 @@ from __future__ import annotations
 import logging
 import re
 
+from os import getpid
 from os import path
 from os import remove
 from shutil import copy as shutil_copy
 from typing import TYPE_CHECKING
 from dataclasses import dataclass
+from openpyxl import load_workbook
+from openpyxl.utils.cell import coordinate_to_tuple
 from xlwings import App as xwApp
 from xlwings import Book as xwBook
 
-from STC.gui.windows.ancestors.model import StandartModel
 from STC.config.config import CFG_HR
 from STC.database.database import DbMkExcel
 from STC.database.database import DbProduct
-from STC.gui.splash_screen import SplashScreen
-from STC.gui.splash_screen import show_dialog
+from STC.progress.progress import PROGRESS
+from STC.product.hierarchical_tree import HierarchicalTree
 
 if TYPE_CHECKING:
     from PyQt5.Qt import QStandardItem
     from STC.gui.windows.hierarchy.model import HierarchicalView
+    from STC.product.hierarchical_tree import HTreeItem
     from STC.product.product import Product
     from STC.config.config import CfgXLHierarchyForDocuments
     from STC.config.config import CfgXLHierarchyNorm
@@ -46,50 +49,113 @@ def index_mk(main_index: str, row: int, full: bool = True) -> str:
     return index if full else index[2:]
 
 
+class XlwingsWriter:
+    """ Запись выгрузки в шаблон через приложение Excel """
+
+    def __init__(self, file_name: str, sheet_name: str) -> None:
+        self.xl_app = xwApp(visible=False)
+        self.workbook = xwBook(file_name)
+        self.worksheet = self.workbook.sheets[sheet_name]
+
+    def readRow(self, row: int, col_start: int, col_fin: int) -> list:
+        """ Значения ячеек строки в диапазоне столбцов """
+        return self.worksheet.range((row, col_start), (row, col_fin)).value
+
+    def write(self, anchor: str, values: list[list]) -> None:
+        """ Запись таблицы значений начиная с ячейки anchor """
+        self.worksheet.range(anchor).value = values
+
+    def save(self, file_name: str) -> None:
+        """ Сохранение книги """
+        self.workbook.save(file_name)
+
+    def close(self) -> None:
+        """ Закрытие книги и приложения Excel """
+        self.workbook.close()
+        self.xl_app.quit()
+
+
+class OpenpyxlWriter:
+    """ Запись выгрузки в шаблон без запуска Excel
+        (макросы шаблона .xlsm сохраняются) """
+
+    def __init__(self, file_name: str, sheet_name: str) -> None:
+        self.workbook = load_workbook(file_name, keep_vba=True)
+        self.worksheet = self.workbook[sheet_name]
+
+    def readRow(self, row: int, col_start: int, col_fin: int) -> list:
+        """ Значения ячеек строки в диапазоне столбцов """
+        return [self.worksheet.cell(row=row, column=col).value
+                for col in range(col_start, col_fin + 1)]
+
+    def write(self, anchor: str, values: list[list]) -> None:
+        """ Запись таблицы значений начиная с ячейки anchor """
+        row_start, col_start = coordinate_to_tuple(anchor)
+        for row, row_values in enumerate(values, start=row_start):
+            for col, value in enumerate(row_values, start=col_start):
+                self.worksheet.cell(row=row, column=col, value=value)
+
+    def save(self, file_name: str) -> None:
+        """ Сохранение книги """
+        self.workbook.save(file_name)
+
+    def close(self) -> None:
+        """ Закрытие книги """
+        self.workbook.close()
+
+
+EXCEL_WRITERS = {'xlwings': XlwingsWriter,
+                 'openpyxl': OpenpyxlWriter}
+
+
 class ExcelExport:
     """ Родительский класс для выгрузок иерархических составов """
     # pylint: disable=too-many-instance-attributes
 
-    def __init__(self, tree_model: HierarchicalView,
+    def __init__(self, tree_model: HierarchicalView | HierarchicalTree,
                  config:
                  CfgXLHierarchyForDocuments |
                  CfgXLHierarchyNorm |
-                 CfgXLHierarchyNTD) -> None:
+                 CfgXLHierarchyNTD,
+                 writer: str | None = None,
+                 interactive: bool = True) -> None:
         logging.info('Выгрузка данных в Excel')
-        SplashScreen().newMessage(message='Определение параметров выгрузки...',
-                                  stage=0,
-                                  stages=6)
+        PROGRESS.newMessage(message='Определение параметров выгрузки...',
+                            stage=0,
+                            stages=6)
         self.config = config
         self.tree_model = tree_model
+        self.writer_name = writer or config.writer
 
         self.initFilePaths()
         self.initCustomConfigData()
         self.initColumns()
 
-        SplashScreen().newMessage(message='Создание документа...')
+        PROGRESS.newMessage(message='Создание документа...')
         shutil_copy(self.wb_main_name, self._wb_temp)
 
-        SplashScreen().newMessage(message='Загрузка данных шаблона...')
+        PROGRESS.newMessage(message='Открытие шаблона...')
+        self.openWorkbook()
+
+        PROGRESS.newMessage(message='Загрузка данных шаблона...')
         self.initTemplateData()
 
-        SplashScreen().newMessage(message='Считывание данных...')
+        PROGRESS.newMessage(message='Считывание данных...')
         self.getData()
 
-        SplashScreen().newMessage(message='Открытие шаблона...')
-        self.openWorkbook()
-
-        SplashScreen().newMessage(message='Запись данных...')
+        PROGRESS.newMessage(message='Запись данных...')
         self.addDataToExcel()
 
-        SplashScreen().newMessage(message='Сохранение выгрузки...')
+        PROGRESS.newMessage(message='Сохранение выгрузки...')
         self.wb_new = self.newWorkbookName()
-        self.workbook.save(self.wb_new)
-        self.workbook.close()
-        self.xl_app.quit()
+        self.writer.save(self.wb_new)
+        self.writer.close()
         remove(self._wb_temp)
 
-        SplashScreen().closeWithWindow()
-        show_dialog(text=f'Завершено создание документа {self.wb_new}', m_type='info')
+        logging.info(f'Завершено создание документа {self.wb_new}')
+        if interactive:
+            PROGRESS.closeWithWindow()
+            PROGRESS.showDialog(text=f'Завершено создание документа {self.wb_new}', m_type='info')
 
     def initFilePaths(self):
         """ Название и место сохранения выгрузки,
@@ -99,7 +165,7 @@ class ExcelExport:
         self.wb_main_name = path.join(self.config.template_folder,
                                       self.config.template_file)
         self._wb_temp = path.join(self.config.temp_folder,
-                                  self.config.template_file)
+                                  f'{getpid()}_{self.config.template_file}')
         self.file_path = self.config.export_file_path
 
     def newWorkbookName(self) -> str:
@@ -122,26 +188,38 @@ class ExcelExport:
         """ Дополнительные данные шаблона выгрузки """
 
     def openWorkbook(self):
-        """ Открыть книгу Excel """
-        self.xl_app = xwApp(visible=False)
-        self.workbook = xwBook(self._wb_temp)
-        self.worksheet = self.workbook.sheets[self.ws_main_name]
+        """ Открыть книгу Excel средством записи, указанным в конфиге """
+        writer_cls = EXCEL_WRITERS[self.writer_name]
+        self.writer = writer_cls(file_name=self._wb_temp,
+                                 sheet_name=self.ws_main_name)
+
+    @property
+    def tree(self) -> HierarchicalTree:
+        """ Данные иерархического древа выгрузки """
+        if isinstance(self.tree_model, HierarchicalTree):
+            return self.tree_model
+        return self.tree_model.model.tree
+
+    @property
+    def root_item(self) -> QStandardItem | HTreeItem:
+        """ Невидимый корень модели (или древа при выгрузке без Qt) """
+        if isinstance(self.tree_model, HierarchicalTree):
+            return self.tree_model.invisibleRootItem()
+        return self.tree_model.model.invisibleRootItem()
 
     def getData(self):
-        """ Генерация модели из древа со считыванием данных """
+        """ Считывание данных древа """
 
-        self._standart_model = StandartModel(tree_view=self.tree_model)
-        self._standart_model.getIndexes()
-        self._standart_model.addData()
+        self.tree_model.fetchAll()
         self._current_row = 1
-        self._tree_row_count = self._standart_model.rowCount()
-        self.treeModelToList(item=self.tree_model.model.invisibleRootItem(),
+        self._tree_row_count = len(self.tree.nodes)
+        self.treeModelToList(item=self.root_item,
                              level=0,
                              main_index='')
-        SplashScreen().changeSubProgressBar(stage=0,
-                                            stages=0)
+        PROGRESS.changeSubProgressBar(stage=0,
+                                      stages=0)
 
-    def treeModelToList(self, item: QStandardItem, level: int, main_index: str):
+    def treeModelToList(self, item: QStandardItem | HTreeItem, level: int, main_index: str):
         """ Перевод данных модели в списки для выгрузки в Excel  """
 
     def addDataToExcel(self) -> None:
@@ -157,9 +235,10 @@ class Excel(ExcelExport):
     """ Выгрузка иерархических составов для
         разработки технологических документов """
 
-    def __init__(self, tree_model: HierarchicalView, full: bool = False) -> None:
+    def __init__(self, tree_model: HierarchicalView | HierarchicalTree,
+                 full: bool = False, **options) -> None:
         self.full = full
-        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_doc)
+        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_doc, **options)
 
     def initCustomConfigData(self):
         """ Дополнительные данные из конфига"""
@@ -189,16 +268,11 @@ class Excel(ExcelExport):
 
     def initTemplateData(self):
         """ Инициализация строки документов """
-        self.openWorkbook()
-        doc_type_row = self.config.doc_type_row
-        doc_type_col_start = self.config.doc_type_col_start
-        doc_type_col_fin = self.config.doc_type_col_fin
-        self.doc_types_excel = self.worksheet.range((doc_type_row, doc_type_col_start),
-                                                    (doc_type_row, doc_type_col_fin)).value
-        self.workbook.close()
-        self.xl_app.quit()
+        self.doc_types_excel = self.writer.readRow(row=self.config.doc_type_row,
+                                                   col_start=self.config.doc_type_col_start,
+                                                   col_fin=self.config.doc_type_col_fin)
 
-    def treeModelToList(self, item: QStandardItem, level: int, main_index: str):
+    def treeModelToList(self, item: QStandardItem | HTreeItem, level: int, main_index: str):
         """ Перевод данных модели в списки для выгрузки в Excel  """
         counter = 0
         for row in range(item.rowCount()):
@@ -210,9 +284,9 @@ class Excel(ExcelExport):
                 sub_index = index_mk(main_index, counter)
                 index = sub_index[2:]
                 counter += 1
-                SplashScreen().newMessage(message=f'Считывание данных...\n{sub_index}', upd_bar=False)
-                SplashScreen().changeSubProgressBar(stage=self._current_row,
-                                                    stages=self._tree_row_count)
+                PROGRESS.step(message=f'Считывание данных...\n{sub_index}',
+                              stage=self._current_row,
+                              stages=self._tree_row_count)
                 self._current_row += 1
 
                 creator = ''
@@ -302,22 +376,22 @@ class Excel(ExcelExport):
 
     def addDataToExcel(self) -> None:
         """ Добавление данных в Excel """
-        self.worksheet.range('L6').value = self.columns.list_num
-        self.worksheet.range('JW6').value = self.columns.list_type
-        self.worksheet.range('JX6').value = self.columns.list_purchased
-        self.worksheet.range('K6').value = self.columns.list_dnkd
-        self.worksheet.range('N6').value = self.columns.list_fio_spec
-        self.worksheet.range('Q6').value = self.columns.list_dep
-        self.worksheet.range('E6').value = self.columns.list_name
-        self.worksheet.range('A6').value = self.columns.list_lvl
-        self.worksheet.range('B6').value = self.columns.list_index
-        self.worksheet.range('KA6').value = self.columns.list_kttp
-        self.worksheet.range('KI6').value = self.columns.list_mk
-        self.worksheet.range('AD6').value = self.columns.list_kd
-        self.worksheet.range('JT6').value = self.columns.list_primary_appearance
-        self.worksheet.range('JP6').value = self.columns.list_kd_date
-        self.worksheet.range('JO6').value = self.columns.list_need_upd
-        self.worksheet.range('JV6').value = self.columns.list_kd_code
+        self.writer.write('L6', self.columns.list_num)
+        self.writer.write('JW6', self.columns.list_type)
+        self.writer.write('JX6', self.columns.list_purchased)
+        self.writer.write('K6', self.columns.list_dnkd)
+        self.writer.write('N6', self.columns.list_fio_spec)
+        self.writer.write('Q6', self.columns.list_dep)
+        self.writer.write('E6', self.columns.list_name)
+        self.writer.write('A6', self.columns.list_lvl)
+        self.writer.write('B6', self.columns.list_index)
+        self.writer.write('KA6', self.columns.list_kttp)
+        self.writer.write('KI6', self.columns.list_mk)
+        self.writer.write('AD6', self.columns.list_kd)
+        self.writer.write('JT6', self.columns.list_primary_appearance)
+        self.writer.write('JP6', self.columns.list_kd_date)
+        self.writer.write('JO6', self.columns.list_need_upd)
+        self.writer.write('JV6', self.columns.list_kd_code)
 
     @property
     def wb_name(self):
@@ -331,8 +405,8 @@ class ExcelNorm(ExcelExport):
     """ Выгрузка иерархических составов для
         оценки трудоемкости изготовления """
 
-    def __init__(self, tree_model: HierarchicalView) -> None:
-        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_nrm)
+    def __init__(self, tree_model: HierarchicalView | HierarchicalTree, **options) -> None:
+        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_nrm, **options)
 
     def initColumns(self):
         """ Номера столбцов """
@@ -344,7 +418,7 @@ class ExcelNorm(ExcelExport):
             list_index=[]
         )
 
-    def treeModelToList(self, item: QStandardItem, level: int, main_index: str):
+    def treeModelToList(self, item: QStandardItem | HTreeItem, level: int, main_index: str):
         """ Перевод данных модели в списки для выгрузки в Excel  """
         for row in range(item.rowCount()):
             child = item.child(row)
@@ -362,11 +436,11 @@ class ExcelNorm(ExcelExport):
     def addDataToExcel(self) -> None:
         """ Добавление данных в Excel """
         self.columns.list_index[0][0] = 'Изделие'
-        self.worksheet.range('A2').value = self.columns.list_lvl
-        self.worksheet.range('B2').value = self.columns.list_index
-        self.worksheet.range('C2').value = self.columns.list_name
-        self.worksheet.range('D2').value = self.columns.list_dnkd
-        self.worksheet.range('F2').value = self.columns.list_num
+        self.writer.write('A2', self.columns.list_lvl)
+        self.writer.write('B2', self.columns.list_index)
+        self.writer.write('C2', self.columns.list_name)
+        self.writer.write('D2', self.columns.list_dnkd)
+        self.writer.write('F2', self.columns.list_num)
 
     @property
     def wb_name(self):
@@ -379,8 +453,8 @@ class ExcelNTD(ExcelExport):
     """ Выгрузка иерархических составов для
         оценки трудоемкости сервисного обслуживания """
 
-    def __init__(self, tree_model: HierarchicalView) -> None:
-        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_ntd)
+    def __init__(self, tree_model: HierarchicalView | HierarchicalTree, **options) -> None:
+        super().__init__(tree_model=tree_model, config=CFG_HR.xl_h_ntd, **options)
 
     def initColumns(self):
         """ Номера столбцов """
@@ -393,7 +467,7 @@ class ExcelNTD(ExcelExport):
             list_msr=[],
         )
 
-    def treeModelToList(self, item: QStandardItem, level: int, main_index: str):
+    def treeModelToList(self, item: QStandardItem | HTreeItem, level: int, main_index: str):
         """ Перевод данных модели в списки для выгрузки в Excel  """
         for row in range(item.rowCount()):
             child = item.child(row)
@@ -411,12 +485,12 @@ class ExcelNTD(ExcelExport):
 
     def addDataToExcel(self) -> None:
         """ Добавление данных в Excel """
-        self.worksheet.range('A4').value = self.columns.list_lvl
-        self.worksheet.range('B4').value = self.columns.list_index
-        self.worksheet.range('C4').value = self.columns.list_name
-        self.worksheet.range('D4').value = self.columns.list_deno
-        self.worksheet.range('E4').value = self.columns.list_num
-        self.worksheet.range('F4').value = self.columns.list_msr
+        self.writer.write('A4', self.columns.list_lvl)
+        self.writer.write('B4', self.columns.list_index)
+        self.writer.write('C4', self.columns.list_name)
+        self.writer.write('D4', self.columns.list_deno)
+        self.writer.write('E4', self.columns.list_num)
+        self.writer.write('F4', self.columns.list_msr)
 
     @property
     def wb_name(self):
@@ -1,119 +1,58 @@
 """ Считывает данные о технологической документации из таблицы Excel"""
 
 from __future__ import annotations
-from dataclasses import dataclass
-from pandas import isnull
+from dataclasses import fields
+from pandas import DataFrame
 from pandas import read_excel
 from STC.config.config import CFG_TD
-from STC.gui.splash_screen import SplashScreen, show_dialog
+from STC.progress.progress import PROGRESS
+
+
+def journal_columns() -> dict[int, str]:
+    """ Столбцы журнала, указанные в настройках (col_*):
+        {номер столбца: название реквизита без префикса col_} """
+    return {getattr(CFG_TD.xl_td, field.name): field.name[len('col_'):]
+            for field in fields(CFG_TD.xl_td) if field.name.startswith('col_')}
+
+
+def journal_path() -> str:
+    """ Путь к файлу журнала технологических документов """
+    return CFG_TD.xl_td.folder + CFG_TD.xl_td.file_name
 
 
 class ExcelRawDataFromTdDb:
-    """ Список экземпляров ExcelDocumentData
-        из файла с учетом технологической документации """
+    """ Реквизиты зарегистрированных документов
+        из файла с учетом технологической документации.
+        documents - таблица со столбцами по названиям реквизитов
+        (deno_td, deno_kd, name, reg_fio, stage, ...) """
 
     def __init__(self) -> None:
-        self.documents = []
+        self.documents = DataFrame(columns=list(journal_columns().values()))
         self.readExcelData()
 
     def readExcelData(self) -> None:
-        """ Проходит построчно таблицу excel и инстанцирует ExcelDocumentData"""
-        SplashScreen().basicMsg('Получение данных из Excel')
-        file = CFG_TD.xl_td.folder + CFG_TD.xl_td.file_name
+        """ Считывает из таблицы excel только столбцы реквизитов """
+        PROGRESS.basicMsg('Получение данных из Excel')
+        file = journal_path()
         sheet_name = CFG_TD.xl_td.sheet_name
+        columns = journal_columns()
         try:
-            table = read_excel(file, sheet_name=sheet_name, header=None)
-            self.readDocumentData(table)
+            table = read_excel(file, sheet_name=sheet_name, header=None,
+                               usecols=lambda column: column in columns)
+            self.readDocumentData(table.rename(columns=columns))
         except FileNotFoundError:
-            SplashScreen().close()
-            show_dialog(f'{file}\nФайл не найден', 'Critical')
-
-    def readDocumentData(self, table):
-        """ Считывает реквизиты зарегистрированных документов """
-        start_row = CFG_TD.xl_td.start_row
-        row_total = len(table[1])
-        for row in range(start_row, row_total):
-            document_data = self.initExcelDocumentData(table, row)
-            SplashScreen().newMessage(message=f'Считывание документов...\n'
-                                              f'{document_data.document.deno}',
-                                      upd_bar=False)
-            SplashScreen().changeSubProgressBar(stage=row,
-                                                stages=row_total)
-            if not isnull(document_data.product.name) \
-                    and not isnull(document_data.product.deno) \
-                    and not isnull(document_data.document.deno):
-                self.documents.append(document_data)
-        SplashScreen().close()
-
-    @staticmethod
-    def initExcelDocumentData(table, row):
-        """ Инициализация реквизитов зарегистрированного документа"""
-        return ExcelDocumentData(
-            document=Document(deno=table[CFG_TD.xl_td.col_deno_td][row],
-                              canceled=table[CFG_TD.xl_td.col_canceled][row],
-                              canceled_date=table[CFG_TD.xl_td.col_canceled_date][row],
-                              archive_num=table[CFG_TD.xl_td.col_archive_num][row],
-                              complex=table[CFG_TD.xl_td.col_complex][row],
-                              stage=table[CFG_TD.xl_td.col_stage][row]
-                              ),
-            product=Product(name=table[CFG_TD.xl_td.col_name][row],
-                            deno=table[CFG_TD.xl_td.col_deno_kd][row],
-                            first_app=table[CFG_TD.xl_td.col_first_app][row]
-                            ),
-            reg_person=Person(fio=table[CFG_TD.xl_td.col_reg_fio][row],
-                              date=table[CFG_TD.xl_td.col_reg_date][row]
-                              ),
-            dev_person=Person(fio=table[CFG_TD.xl_td.col_dev_fio][row],
-                              date=table[CFG_TD.xl_td.col_dev_date][row]
-                              ),
-            norm_contr=NormContr(norm_date=table[CFG_TD.xl_td.col_norm_date][row],
-                                 norm_num=table[CFG_TD.xl_td.col_norm_num][row]
-                                 )
-        )
-
-
-@dataclass
-class ExcelDocumentData:
-    """ Все реквизиты зарегистрированного документа """
-    document: Document
-    product: Product
-    reg_person: Person
-    dev_person: Person
-    norm_contr: NormContr
-
-
-@dataclass
-class Product:
-    """ Изделие, на которое выпущен документ """
-    name: str
-    deno: str
-    first_app: str
-
-
-@dataclass
-class Document:
-    """ Реквизиты и жизненный цикл документа """
-    deno: str
-    canceled: str
-    canceled_date: str
-    archive_num: str
-    complex: str
-    stage: str
-
-    def __post_init__(self):
-        if not isnull(self.canceled):
-            self.stage = self.canceled.capitalize()
-
-
-@dataclass
-class NormContr:
-    """ Данные по нормоконтролю """
-    norm_date: str
-    norm_num: str
-
-
-@dataclass
-class Person:
-    """ ФИО и дата для разработчика или регистрирующего """
-    fio: str
-    date: str
+            PROGRESS.close()
+            PROGRESS.showDialog(f'{file}\nФайл не найден', 'Critical')
+
+    def readDocumentData(self, table: DataFrame) -> None:
+        """ Отбирает зарегистрированные документы с наименованием
+            и обозначениями изделия и документа. Стадия аннулированных
+            документов - отметка об аннулировании """
+        PROGRESS.newMessage(message='Считывание документов...', upd_bar=False)
+        table = table.iloc[CFG_TD.xl_td.start_row:]
+        table = table[table['name'].notna() & table['deno_kd'].notna() & table['deno_td'].notna()]
+        table = table.reset_index(drop=True)
+        table['stage'] = table['stage'].mask(table['canceled'].notna(),
+                                             table['canceled'].str.capitalize())
+        self.documents = table
+        PROGRESS.close()
@@ -2,23 +2,126 @@
 
 from __future__ import annotations
 
+import hashlib
 import re
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from os import listdir
+from itertools import starmap
+from os import cpu_count
+from os import getpid
+from os import makedirs
 from os import path
+from os import remove
+from os import replace
+from os import scandir
 
 from pandas import DataFrame
 from pandas import isnull
 from pandas import read_excel
+from pandas import read_pickle
 from pandas import read_csv
 
 from STC.config.config import CFG_HR
+from STC.database.database import DbConnection
+from STC.database.database import DbImportFile
 from STC.database.database import DbProduct
 from STC.database.database import DbProductKind
 from STC.database.database import DbProductType
 from STC.functions.func import null_cleaner
-from STC.gui.splash_screen import SplashScreen
-from STC.gui.splash_screen import show_dialog
+from STC.progress.progress import PROGRESS
+
+
+def used_columns() -> set[int]:
+    """ Номера столбцов таблицы "Список КД и ТД",
+        используемые при импорте """
+    cfg = CFG_HR.xl_h_doc
+    columns = {1, cfg.index_col, cfg.deno_col, cfg.name_col, cfg.quantity_col,
+               cfg.type_col, cfg.purchased_col, cfg.upd_date_col,
+               cfg.primary_application_col, cfg.doc_td_deno, cfg.doc_td_org_type,
+               cfg.mk_type_col, cfg.mk_place_col}
+    columns.update(range(cfg.doc_first_col, cfg.doc_last_col))
+    # код МК и до 13 пар (код операции, текст операции)
+    columns.update(range(cfg.mk_code_col, cfg.mk_code_col + 27))
+    return columns
+
+
+def table_cache_path(file_hash: str) -> str:
+    """ Путь к кэшу считанной таблицы проекта. Кэш определяется
+        хэшем содержимого файла и набором считываемых столбцов """
+    columns = repr((CFG_HR.xl_h_doc.sheet_name, sorted(used_columns())))
+    columns_key = hashlib.md5(columns.encode('utf-8')).hexdigest()[:8]
+    return path.join(CFG_HR.xl_h_doc.cache_folder, f'{file_hash}_{columns_key}.pkl')
+
+
+def read_project_table(file_path: str, cache_path: str | None = None,
+                       use_cache: bool = False, save_cache: bool = True) -> DataFrame:
+    """ Считывание таблицы проекта (выполняется в процессе пула).
+        Считываются только используемые столбцы,
+        номера столбцов сохраняются. Считанная таблица
+        сохраняется в кэш cache_path (кроме save_cache=False),
+        при use_cache таблица берется из кэша, если он есть """
+    if use_cache and cache_path is not None and path.isfile(cache_path):
+        return read_pickle(cache_path)
+    columns = used_columns()
+    table = read_excel(file_path,
+                       sheet_name=CFG_HR.xl_h_doc.sheet_name,
+                       header=None,
+                       usecols=lambda column: column in columns)
+    if cache_path is not None and save_cache:
+        temp_path = f'{cache_path}.{getpid()}'
+        table.to_pickle(temp_path)
+        replace(temp_path, cache_path)
+    return table
+
+
+class ProjectTables:
+    """ Очередь считывания таблиц проектов в пуле процессов.
+        Наперед считывается не более queue_size таблиц, поэтому
+        считывание идет параллельно с работой основного процесса
+        (загрузкой данных из БД, объединением таблиц), а в памяти
+        одновременно находится ограниченное число таблиц.
+        Таблицы возвращаются в порядке файлов """
+
+    def __init__(self, tasks: list[tuple]) -> None:
+        self.tasks = tasks  # аргументы read_project_table
+        self.next_file = 0
+        self.pending = deque()  # Future считываемых таблиц в порядке файлов
+        self.executor = None
+        self.queue_size = 0
+        workers = CFG_HR.xl_h_doc.workers or None
+        if len(tasks) > 1 and workers != 1:
+            self.queue_size = CFG_HR.xl_h_doc.queue_size or 2 * (workers or cpu_count() or 1)
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            self.fill()
+
+    def fill(self) -> None:
+        """ Постановка файлов в очередь считывания до заполнения очереди """
+
+        while self.next_file < len(self.tasks) and len(self.pending) < self.queue_size:
+            self.pending.append(self.executor.submit(read_project_table, *self.tasks[self.next_file]))
+            self.next_file += 1
+
+    def __iter__(self) -> Iterator[DataFrame]:
+        if self.executor is None:
+            yield from starmap(read_project_table, self.tasks)
+            return
+        try:
+            while self.pending:
+                table = self.pending.popleft().result()
+                self.fill()
+                yield table
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """ Остановка пула с отменой не начатых считываний """
+
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.pending.clear()
 
 
 class ExcelData:
@@ -40,41 +143,86 @@ class ExcelData:
 
        documents_td = {'Обозначение ТД': {'Проект 1', 'Проект 2', 'Проект 3'}}"""
 
-    def __init__(self) -> None:
+    def __init__(self, merge: bool = True, full: bool = False, skip_unchanged: bool = False) -> None:
+        """ merge=False -> таблицы считываются в фоне до вызова merge
+            full -> считать все таблицы заново, без кэша
+            skip_unchanged -> не считывать таблицы, если ни одна
+            не изменилась с прошлого импорта (tables = None) """
         self.products = {}
         self.project = None
         self.documents_td = {}
         self.deno_col = CFG_HR.xl_h_doc.deno_col
+        self.files = self.getExcelFiles(CFG_HR.xl_h_doc.folder, CFG_HR.xl_h_doc.file_name_extension)
+        file_paths = [path.join(CFG_HR.xl_h_doc.folder, file) for file in self.files]
+        self.import_diff = DbImportFile.diff(source='excel', paths=file_paths, full=full)
+        cache_paths = [table_cache_path(self.import_diff.hashes[file_path]) for file_path in file_paths]
+        changed = set(self.import_diff.changed)
+        self.reimported = [file_path for file_path, cache_path in zip(file_paths, cache_paths)
+                           if file_path in changed or not path.isfile(cache_path)]
+        DbImportFile.report(title='Таблицы проектов Excel',
+                            unchanged=len(file_paths) - len(self.reimported),
+                            reimported=len(self.reimported),
+                            removed=len(self.import_diff.removed))
+        self.tables = None
+        if skip_unchanged and not self.import_diff.changed and not self.import_diff.removed:
+            return
+        # пробный запуск не изменяет кэш таблиц
+        save_cache = DbConnection.dry_run_transaction is None
+        if save_cache:
+            makedirs(CFG_HR.xl_h_doc.cache_folder, exist_ok=True)
+        self.tables = ProjectTables([(file_path, cache_path, not full, save_cache)
+                                     for file_path, cache_path in zip(file_paths, cache_paths)])
+        DbProduct.updCheck()
+        DbProductKind.updCheck()
+        DbProductType.updCheck()
         self.getNormExcelData()
-        files = self.getExcelFiles(CFG_HR.xl_h_doc.folder)
-        stages = len(self.getExcelFiles(CFG_HR.xl_h_doc.folder))
-        for stage, file in enumerate(files):
-            name, ext = path.splitext(file)
-            if ext == CFG_HR.xl_h_doc.file_name_extension:
-                SplashScreen().changeSubProgressBar(stage=stage, stages=stages)
-                self.projectName(name)
-                self.readExcelData(path.join(CFG_HR.xl_h_doc.folder, file))
+        if merge:
+            self.merge()
+
+    def merge(self) -> None:
+        """ Объединение данных таблиц проектов по мере их считывания.
+            При merge=False в конструкторе таблицы считываются в фоне
+            до вызова метода """
+        for stage, (file, table) in enumerate(zip(self.files, self.tables)):
+            PROGRESS.changeSubProgressBar(stage=stage, stages=len(self.files))
+            self.projectName(path.splitext(file)[0])
+            self.readExcelData(table)
         self.correctProductData()
-        SplashScreen().changeSubProgressBar(stage=0, stages=0)
+        PROGRESS.changeSubProgressBar(stage=0, stages=0)
+
+    def saveManifest(self) -> None:
+        """ Запись состояния таблиц в манифест импорта после
+            успешного внесения данных в БД и удаление кэша
+            таблиц, которых больше нет """
+        DbImportFile.markApplied(source='excel',
+                                 removed=self.import_diff.removed,
+                                 reimported=self.reimported)
+        cache_files = {path.basename(table_cache_path(file_hash))
+                       for file_hash in self.import_diff.hashes.values()}
+        if path.isdir(CFG_HR.xl_h_doc.cache_folder):
+            with scandir(CFG_HR.xl_h_doc.cache_folder) as entries:
+                outdated = [entry.path for entry in entries
+                            if entry.name.endswith('.pkl') and entry.name not in cache_files]
+            for cache_path in outdated:
+                remove(cache_path)
 
     def projectName(self, name: str) -> None:
         """ Вырезает имя проекта из названия файла"""
         project = name[len(f'{CFG_HR.xl_h_doc.file_name_prefix}') + 1:]
         self.project = project.lstrip().rstrip()
 
-    def readExcelData(self, file: str) -> None:
+    def readExcelData(self, table: DataFrame) -> None:
         """ Проходит по строкам таблицы состава изделия,
             создает для каждой строки ExcelProduct.
             Добавляет ExcelProduct в словарь с ключом по обозначению изделия
             Например: {'АБВГ.123456.789': ExcelProduct1,
                        'АБВГ.123456.987': ExcelProduct2}"""
-        SplashScreen().newMessage(message=f'Импорт данных Excel...\n{self.project}',
-                                  stage=SplashScreen().stage)
-        table = read_excel(file, sheet_name=CFG_HR.xl_h_doc.sheet_name, header=None)
+        PROGRESS.newMessage(message=f'Импорт данных Excel...\n{self.project}',
+                            stage=PROGRESS.stage)
         start_row = CFG_HR.xl_h_doc.doc_type_row + 1
         stages = len(table[1]) - start_row - 1
         for row in range(start_row, len(table[1])):
-            SplashScreen().changeSubProgressBar(stage=row, stages=stages)
+            PROGRESS.changeSubProgressBar(stage=row, stages=stages)
             deno = table[self.deno_col][row]
             try:
                 product = self.products[deno]
@@ -86,11 +234,13 @@ class ExcelData:
             self.products.update({product.deno: product})
 
     @staticmethod
-    def getExcelFiles(directory: str) -> list[str]:
-        """ Сортирует файлы от старых к новым"""
-        files = listdir(directory)
-        list_of_files = sorted(files, key=lambda x: path.getmtime(path.join(directory, x)))
-        return list_of_files
+    def getExcelFiles(directory: str, extension: str) -> list[str]:
+        """ Файлы таблиц с расширением extension от старых к новым
+            (время изменения берется из одного обхода директории) """
+        with scandir(directory) as entries:
+            files = [(entry.stat().st_mtime, entry.name) for entry in entries
+                     if path.splitext(entry.name)[1] == extension]
+        return [name for _, name in sorted(files)]
 
     def getNormExcelData(self):
         """ Считывает данные из сводной таблицы трудоемкостей и
@@ -102,8 +252,9 @@ class ExcelData:
             table = read_csv(file, sep=';', usecols=[deno_col, norm_col], index_col=False)
         except FileNotFoundError:
             table = None
-            show_dialog('Файл _Таблица трудоемкостей.csv не найден.\n'
-                        'Проверка ПКИ не будет проведена')
+            PROGRESS.showDialog('Файл _Таблица трудоемкостей.csv не найден.\n'
+                                'Проверка ПКИ не будет проведена',
+                                m_type='warning')
         start_row = 2
         self.norm_dict = {}
         if table is not None:
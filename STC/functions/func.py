@@ -1,5 +1,6 @@
 """ Модуль содержит различные функции, используемые в других модулях """
 
+import hashlib
 import re
 import time
 from datetime import datetime
@@ -44,6 +45,15 @@ def text_slicer(text: str, max_len: int) -> list[str]:
     return [text]
 
 
+def file_hash(file_path: str) -> str:
+    """ Хэш содержимого файла """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
 def benchmark(func):
     """ Декоратор для замера времени выполнения """
 
@@ -88,6 +98,16 @@ def product_quantity(str_num: str | int | float) -> int | float:
     return str_num
 
 
+def cell_text(value: str | int | float | None) -> str:
+    """ Текст ячейки иерархической таблицы
+        (целые дробные числа без '.0', как в QStandardItem) """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
 def sort_un(list_of_items: list) -> list:
     """ Возвращает сортированный список уникальных значений """
     return sorted(list(set(list_of_items)))
@@ -270,3 +270,46 @@ class SplashScreen(QSplashScreen):
             logging.debug(message)
         else:
             pass
+
+
+class SplashScreenSink:
+    """ Приемник хода выполнения слоя данных (STC.progress.progress),
+        выводящий его в SplashScreen и диалоговые окна """
+
+    @staticmethod
+    def newMessage(message: str,
+                   stage: int | None = None,
+                   stages: int | None = None,
+                   upd_bar: bool = True,
+                   hide_pb: bool = False) -> None:
+        """ Текст сообщения и состояние основного прогресс бара """
+
+        SplashScreen().newMessage(message=message,
+                                  stage=stage,
+                                  stages=stages,
+                                  upd_bar=upd_bar,
+                                  hide_pb=hide_pb)
+
+    @staticmethod
+    def changeSubProgressBar(stage: int | None = None, stages: int | None = None) -> None:
+        """ Состояние дополнительного прогресс бара """
+
+        SplashScreen().changeSubProgressBar(stage=stage, stages=stages)
+
+    @staticmethod
+    def showDialog(text: str, m_type: str | None = None) -> None:
+        """ Диалоговое окно """
+
+        show_dialog(text=text, m_type=m_type)
+
+    @staticmethod
+    def closeWithWindow(window=None, msg: str | None = None, m_type: str = 'info') -> None:
+        """ Закрыть splashscreen """
+
+        SplashScreen().closeWithWindow(window=window, msg=msg, m_type=m_type)
+
+    @staticmethod
+    def close() -> None:
+        """ Скрыть splashscreen """
+
+        SplashScreen().close()
@@ -54,6 +54,7 @@ class StandartModel(QStandardItemModel):
     def getIndexes(self) -> None:
         """ Собирает все индексы из древа HierarchicalView """
 
+        self.tree_view.fetchAll()
         self.indexes = []
         index = self.tree_view.model.index(0, 0, self.tree_view.model.invisibleRootItem().index())
         self.indexes.extend(self.tree_view.model.match(index, Qt.DisplayRole, '',
@@ -1206,6 +1206,7 @@ class FrameAdminDocDef(FrameAdminDef):
     def addData(self, row: int, id_item: str, item: str, sentence: str):
         """ Добавление новых данных в БД """
 
+        DbDocumentType.updCheck()
         id_type = DbDocumentType.data[('КД', item)].id_type
         id_sentence = DbSentence.data[sentence].id_sentence
         if id_item == self.__class__.new:
@@ -1530,6 +1531,7 @@ class FrameAdminOperationsDef(FrameAdminDef):
             id_area = DbArea.data[area].id_area
             id_workplace = DbWorkplace.data[workplace].id_workplace
             id_profession = DbProfession.data[profession].id_profession
+            DbProductKind.updCheck()
             id_kind = DbProductKind.data[kind].id_kind
             if id_operation_def == self.__class__.new:
                 db_operation_def = DbOperationDef.addNewOperationDef(
@@ -1824,6 +1826,7 @@ class FrameAdminProduct(FrameAdmin):
         """ Инициализация данных по умолчанию """
 
         row = 0
+        DbProduct.updCheck()
         data = DbProduct.data
         self.table.blockSignals(True)
         for db_product in data.values():
@@ -0,0 +1,76 @@
+""" Окно хода загрузки иерархического древа в фоновом потоке """
+
+from __future__ import annotations
+
+import logging
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+from STC.gui.splash_screen import show_dialog
+from STC.thread.thread import ThreadHierarchyLoader
+
+
+class WindowHierarchyLoading(QProgressDialog):
+    """ Ход загрузки иерархического древа. Окно не блокирует
+        остальные окна приложения, загрузку можно отменить.
+        Загруженные данные передаются сигналом loaded """
+
+    loaded = pyqtSignal(object)
+    loaders = []  # потоки, работающие до завершения загрузки
+
+    def __init__(self, title: str, id_product: int, reverse: bool = False, levels: int = 0) -> None:
+        super().__init__(f'{title}\nПодключение к базе данных...', 'Отмена', 0, 0)
+        self.title = title
+        self.is_canceled = False
+        self.setWindowTitle('Загрузка иерархии')
+        self.setWindowModality(Qt.NonModal)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.loader = ThreadHierarchyLoader(id_product=id_product, reverse=reverse, levels=levels)
+        self.__class__.loaders.append(self.loader)
+        self.loader.progress.connect(self.updProgress)
+        self.loader.loaded.connect(self.finishLoading)
+        self.loader.failed.connect(self.failLoading)
+        self.loader.finished.connect(self.deleteLoader)
+        self.canceled.connect(self.cancelLoading)
+        logging.info(title)
+        self.loader.start()
+
+    def updProgress(self, message: str, stage: int, stages: int) -> None:
+        """ Сообщение и прогресс бар по ходу загрузки """
+
+        if self.is_canceled:
+            return
+        self.setLabelText(f'{self.title}\n{message}')
+        self.setMaximum(stages)
+        self.setValue(stage)
+
+    def finishLoading(self, data: object) -> None:
+        """ Передача загруженных данных, если загрузка не отменена """
+
+        self.hide()
+        if not self.is_canceled:
+            self.loaded.emit(data)
+
+    def failLoading(self, text: str) -> None:
+        """ Сообщение об ошибке загрузки """
+
+        self.hide()
+        show_dialog(text=f'{self.title}\nОшибка загрузки иерархии\n{text}', m_type='critical')
+
+    def cancelLoading(self) -> None:
+        """ Отмена загрузки """
+
+        self.is_canceled = True
+        if self.loader.isRunning():
+            logging.info(f'{self.title}: загрузка отменена')
+            self.loader.requestInterruption()
+        self.hide()
+
+    def deleteLoader(self) -> None:
+        """ Поток завершен """
+
+        self.__class__.loaders.remove(self.loader)
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
+from itertools import islice
 from typing import TYPE_CHECKING
 
 import datetime
 import logging
+import re
 from PyQt5.Qt import QStandardItem
-from PyQt5.Qt import QStandardItemModel
+from PyQt5.QtCore import QAbstractItemModel
+from PyQt5.QtCore import QModelIndex
 from PyQt5.QtCore import Qt
 from PyQt5.QtCore import QDateTime
 from PyQt5.QtCore import pyqtSignal
@@ -18,32 +22,451 @@ from PyQt5.QtWidgets import QTreeView
 from PyQt5.QtWidgets import QStyledItemDelegate
 from PyQt5.QtWidgets import QStylePainter
 from PyQt5.QtWidgets import QComboBox
+from STC.functions.func import cell_text
 from STC.gui.splash_screen import SplashScreen
 from STC.product.hierarchical_tree import HierarchicalTree
 from STC.product.product import ProductKind
-from STC.gui.splash_screen import show_dialog
 
 if TYPE_CHECKING:
-    from PyQt5.Qt import QModelIndex
     from PyQt5.Qt import QColor
     from PyQt5.Qt import QPaintEvent
     from PyQt5.Qt import QStyleOptionViewItem
     from PyQt5.Qt import QWidget
+    from STC.database.database import HierarchyData
     from STC.product.product import Product
+    from STC.product.hierarchical_tree import HTreeNode
 
 
-class HierarchicalModel(QStandardItemModel):
-    """ Модель иерархического древа """
+class HierarchicalItem:
+    """ Ячейка модели иерархического древа с интерфейсом QStandardItem.
+        Не хранит данных, а обращается к модели по позиции
+        вхождения в древо (-1 - невидимый корень) и столбцу """
+
+    __slots__ = ('model', 'position', 'column')
+
+    def __init__(self, model: HierarchicalModel, position: int, column: int = 0) -> None:
+        self.model = model
+        self.position = position
+        self.column = column
+
+    def index(self) -> QModelIndex:
+        """ Индекс ячейки в модели """
+
+        if self.position < 0:
+            return QModelIndex()
+        return self.model.nodeIndex(position=self.position, column=self.column)
+
+    def rowCount(self) -> int:
+        """ Количество дочерних строк """
+
+        if self.column:
+            return 0
+        return len(self.model.children[self.position])
+
+    def child(self, row: int, column: int = 0) -> HierarchicalItem | None:
+        """ Дочерняя ячейка """
+
+        try:
+            return HierarchicalItem(model=self.model,
+                                    position=self.model.children[self.position][row],
+                                    column=column)
+        except IndexError:
+            return None
+
+    def data(self, role: int = Qt.UserRole + 1):
+        """ Данные ячейки для определенной роли """
+
+        return self.model.data(self.index(), role)
+
+    def setData(self, value, role: int = Qt.UserRole + 1) -> None:
+        """ Изменяет данные ячейки для определенной роли """
+
+        self.model.setData(self.index(), value, role)
+
+    def text(self) -> str:
+        """ Текст ячейки """
+
+        value = self.data(Qt.DisplayRole)
+        if isinstance(value, QDateTime):
+            return value.toString(Qt.ISODate)
+        return cell_text(value)
+
+
+class HierarchicalModel(QAbstractItemModel):
+    """ Модель иерархического древа. Данные берутся из HierarchicalTree,
+        значения ячеек рассчитываются при первом обращении и кэшируются """
+
+    # pylint: disable=too-many-public-methods
 
     updKttpSignal = pyqtSignal(list)
     addKttpSignal = pyqtSignal(list)
     delKttpSignal = pyqtSignal(list)
     updProductKindSignal = pyqtSignal(str)
     updTreeView = pyqtSignal()
+    nodesInserted = pyqtSignal()
 
-    def __init__(self, product_denotation: str, reverse: bool = False) -> None:
+    def __init__(self, product_denotation: str, reverse: bool = False,
+                 data: HierarchyData | None = None) -> None:
         super().__init__()
-        self.tree = HierarchicalTree(product_denotation, reverse)
+        self.tree = HierarchicalTree(product_denotation, reverse, data=data)
+        self.headers = []  # названия столбцов
+        self.columns_data = []  # настройки данных дополнительных столбцов
+        self.cells = {}  # {(позиция вхождения, столбец): значение}
+        self.product_columns = {}  # {столбец: [значение для строки матрицы документов]}
+        self.roles = {}  # {(позиция вхождения, столбец, роль): значение}
+        self.children = {-1: [0]}  # {позиция вхождения: [позиции дочерних вхождений]}
+        self.rows = []  # номер строки вхождения относительно родителя
+        self.initNodes()
+
+    def initNodes(self) -> None:
+        """ Индекс родитель - дети для вхождений древа """
+
+        self.beginResetModel()
+        self.children = {-1: [0]}
+        self.rows = []
+        for node in self.tree.nodes:
+            self.children[node.position] = []
+            if node.parent < 0:
+                self.rows.append(0)
+            else:
+                self.rows.append(len(self.children[node.parent]))
+                self.children[node.parent].append(node.position)
+        self.cells = {}
+        self.roles = {}
+        self.endResetModel()
+
+    def nodeIndex(self, position: int, column: int = 0) -> QModelIndex:
+        """ Индекс модели для вхождения древа """
+
+        return self.createIndex(self.rows[position], column, self.tree.nodes[position])
+
+    @staticmethod
+    def indexPosition(index: QModelIndex) -> int:
+        """ Позиция вхождения древа по индексу модели """
+
+        if not index.isValid():
+            return -1
+        node: HTreeNode = index.internalPointer()
+        return node.position
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        """ Индекс ячейки по строке и столбцу относительно родителя """
+
+        if parent.isValid() and parent.column():
+            return QModelIndex()
+        children = self.children[self.indexPosition(parent)]
+        if not 0 <= row < len(children) or not 0 <= column < self.columnCount():
+            return QModelIndex()
+        return self.nodeIndex(position=children[row], column=column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        """ Индекс родительской ячейки """
+
+        if not index.isValid():
+            return QModelIndex()
+        node: HTreeNode = index.internalPointer()
+        if node.parent < 0:
+            return QModelIndex()
+        return self.nodeIndex(position=node.parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """ Количество дочерних строк """
+
+        if parent.isValid() and parent.column():
+            return 0
+        return len(self.children[self.indexPosition(parent)])
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """ Количество столбцов """
+
+        return len(self.headers)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """ Есть ли дочерние строки (в т.ч. еще не загруженные) """
+
+        if parent.isValid() and parent.column():
+            return False
+        position = self.indexPosition(parent)
+        return bool(self.children[position]) or position in self.tree.pending
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """ Есть ли не загруженные дочерние строки """
+
+        return self.indexPosition(parent) in self.tree.pending
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """ Догрузка дочерних строк при раскрытии ветви """
+
+        self.insertNodes(positions=self.tree.fetchMore(position=self.indexPosition(parent)))
+
+    def fetchToLevel(self, level: int) -> None:
+        """ Догрузка строк до уровня level включительно """
+
+        self.insertNodes(positions=self.tree.fetchToLevel(level=level))
+
+    def fetchAll(self) -> None:
+        """ Загрузка всего древа (для операций над всем древом) """
+
+        self.insertNodes(positions=self.tree.fetchAll())
+
+    def insertNodes(self, positions: list[int]) -> None:
+        """ Вставка в модель созданных вхождений древа. Строки вставляются
+            группами по родителю, родительские строки - раньше дочерних """
+
+        if not positions:
+            return
+        groups = {}
+        for position in positions:
+            groups.setdefault(self.tree.nodes[position].parent, []).append(position)
+        self.rows.extend([0] * (len(self.tree.nodes) - len(self.rows)))
+        for parent, group in groups.items():
+            children = self.children[parent]
+            self.beginInsertRows(self.nodeIndex(position=parent), len(children), len(children) + len(group) - 1)
+            for position in group:
+                self.rows[position] = len(children)
+                children.append(position)
+                self.children[position] = []
+            self.endInsertRows()
+        for column, data in enumerate(self.columns_data):
+            if column in self.product_columns or data is not None and 'sub_products' in data:
+                self.fillColumn(column=column, positions=positions)
+        self.nodesInserted.emit()
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        """ Флаги ячейки """
+
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """ Данные ячейки. Для роли Qt.UserRole + 1 первого
+            столбца (как у QStandardItem) возвращается изделие """
+
+        if not index.isValid():
+            return None
+        position = self.indexPosition(index)
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.cellValue(position=position, column=column)
+        if role == Qt.UserRole + 1:
+            return self.tree.nodes[position].branch.product if not column else None
+        return self.roles.get((position, column, role))
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        """ Изменяет данные ячейки """
+
+        if not index.isValid():
+            return False
+        position = self.indexPosition(index)
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            self.cells[(position, index.column())] = value
+        else:
+            self.roles[(position, index.column(), role)] = value
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        """ Названия столбцов """
+
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole \
+                and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return None
+
+    def setHorizontalHeaderLabels(self, labels: list[str] | tuple[str]) -> None:
+        """ Задает названия основных столбцов """
+
+        self.beginResetModel()
+        self.headers = list(labels)
+        self.columns_data = [None] * len(self.headers)
+        self.cells = {}
+        self.endResetModel()
+
+    def horizontalHeaderItem(self, column: int) -> QStandardItem:
+        """ Название столбца в виде QStandardItem """
+
+        return QStandardItem(self.headers[column])
+
+    def setHorizontalHeaderItem(self, column: int, item: QStandardItem) -> None:
+        """ Изменяет название столбца """
+
+        self.headers[column] = item.text()
+        self.headerDataChanged.emit(Qt.Horizontal, column, column)
+
+    def invisibleRootItem(self) -> HierarchicalItem:
+        """ Невидимый корень древа """
+
+        return HierarchicalItem(model=self, position=-1)
+
+    def itemFromIndex(self, index: QModelIndex) -> HierarchicalItem:
+        """ Ячейка по индексу модели """
+
+        return HierarchicalItem(model=self,
+                                position=self.indexPosition(index),
+                                column=index.column())
+
+    def cellValue(self, position: int, column: int):
+        """ Значение ячейки, рассчитываемое при первом обращении """
+
+        key = (position, column)
+        if key not in self.cells:
+            branch = self.tree.nodes[position].branch
+            data = self.columns_data[column]
+            if column in self.product_columns:
+                value = self.qtValue(
+                    self.product_columns[column][self.tree.products[branch.product]])
+            elif data is not None:
+                value = self.productData(product=branch.product, data=data)
+            else:
+                value = self.tree.nodeValues(position=position)[column]
+            self.cells[key] = value
+        return self.cells[key]
+
+    @staticmethod
+    def productData(product: Product, data: dict[str, str | bool | None | dict[Product, str]]):
+        """ Запрос определенного аттрибута у изделия """
+
+        return HierarchicalModel.qtValue(product.getData(data=data))
+
+    @staticmethod
+    def qtValue(text):
+        """ Преобразует дату в QDateTime для отображения в модели """
+
+        if isinstance(text, datetime.date):
+            date = QDateTime()
+            date.setSecsSinceEpoch(int(text.timestamp()))
+            text = date
+        return text
+
+    def addColumn(self, data: dict[str, str | bool | None | dict[Product, str]]) -> int:
+        """ Добавляет столбец с данными изделий. Возвращает номер столбца """
+
+        column = self.columnCount()
+        self.beginInsertColumns(QModelIndex(), column, column)
+        self.headers.append(data['header'])
+        self.columns_data.append(data)
+        self.endInsertColumns()
+        self.fillColumn(column=column)
+        return column
+
+    def fillColumn(self, column: int,
+                   data: dict[str, str | bool | None | dict[Product, str]] | None = None,
+                   positions: Iterable[int] | None = None) -> None:
+        """ Сбрасывает рассчитанные значения столбца.
+            Столбцы документов рассчитываются сразу для всех изделий
+            по матрице документов древа. Данные документов совместного
+            изготовления ('sub_products') зависят от порядка обхода,
+            поэтому такие столбцы рассчитываются сразу для всего древа.
+            positions -> только догруженные вхождения (None - все) """
+
+        if data is not None:
+            self.columns_data[column] = data
+        data = self.columns_data[column]
+        if positions is None:
+            positions = range(len(self.tree.nodes))
+            self.product_columns.pop(column, None)
+        for position in positions:
+            self.cells.pop((position, column), None)
+        if data is not None and data['type'] == 'document' and 'sub_products' not in data:
+            if column in self.product_columns:
+                values = self.product_columns[column]
+                for product in islice(self.tree.products, len(values), None):
+                    values.append(product.getData(data=data))
+            else:
+                self.product_columns[column] = self.tree.documentColumn(data=data)
+        elif data is not None and 'sub_products' in data:
+            for position in positions:
+                node = self.tree.nodes[position]
+                product = node.branch.product
+                text = self.productData(product=product, data=data)
+                self.addComplexDocumentInfo(product=product, data=data)
+                self.cells[(node.position, column)] = self.addComplexDocumentText(
+                    product=product, data=data, text=text)
+        self.emitColumnChanged(column=column, positions=positions)
+
+    def emitColumnChanged(self, column: int, positions: Iterable[int]) -> None:
+        """ Сигнал об изменении ячеек столбца для вхождений positions:
+            по диапазону строк для каждой родительской строки """
+
+        ranges = {}  # {родитель: (первое вхождение, последнее вхождение)}
+        for position in positions:
+            parent = self.tree.nodes[position].parent
+            first, last = ranges.get(parent, (position, position))
+            if self.rows[position] < self.rows[first]:
+                first = position
+            if self.rows[position] > self.rows[last]:
+                last = position
+            ranges[parent] = (first, last)
+        for first, last in ranges.values():
+            self.dataChanged.emit(self.nodeIndex(position=first, column=column),
+                                  self.nodeIndex(position=last, column=column))
+
+    @staticmethod
+    def addComplexDocumentText(product, text: str,
+                               data: dict[str, str | bool | None | dict[Product, str]]) -> str:
+        """ Дополняет данными для документов совместного изготовления """
+
+        product_dict = data['sub_products']
+        additional_text = product_dict.pop(product, None)
+        if additional_text is not None:
+            if text:
+                return '\n'.join([additional_text, text])
+            return additional_text
+        return text
+
+    def addComplexDocumentInfo(self, data: dict[str, str | bool | None | dict[Product, str]],
+                               product: Product) -> dict[str, str | bool | None | dict[Product, str]]:
+        """ Сохраняет данные об изделиях в составе составной МК """
+
+        sub_data = data.copy()
+        sub_data['setting'] = 'sub_products_new'
+        sub_data['only_text'] = False
+        documents_data = product.getData(sub_data)
+
+        if documents_data is not None:
+            for document_data in documents_data:
+                for sub_product, document in document_data:
+                    data['sub_products'][sub_product] = \
+                        self.addComplexDocumentText(
+                            product=sub_product,
+                            data=data,
+                            text=f'В составе {document.deno}')
+        return data
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        """ Сортировка дочерних строк всех уровней по значениям столбца.
+            При column < 0 восстанавливается исходный порядок древа.
+            Индексы вхождений (1.2.10.) сравниваются по номерам """
+
+        def sortKey(position: int) -> tuple:
+            if column < 0:
+                return (0, 0, position)
+            value = self.cellValue(position=position, column=column)
+            if value is None:
+                return (1, 0, 0)
+            if isinstance(value, QDateTime):
+                return (0, 0, value.toMSecsSinceEpoch())
+            if isinstance(value, (int, float)):
+                return (0, 0, value)
+            if isinstance(value, str) and re.fullmatch(r'(\d+[.])+', value):
+                return (0, 1, tuple(int(number) for number in value.split('.')[:-1]))
+            return (0, 2, str(value))
+
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_positions = [(self.indexPosition(index), index.column()) for index in old_indexes]
+        for position, children in self.children.items():
+            if position >= 0 and len(children) > 1:
+                children.sort(key=sortKey, reverse=order == Qt.DescendingOrder)
+                for row, child in enumerate(children):
+                    self.rows[child] = row
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.nodeIndex(position=position, column=column)
+             if position >= 0 else QModelIndex()
+             for position, column in old_positions])
+        self.layoutChanged.emit()
 
     def updKttp(self, names: list) -> None:
         """ Посылает сигнал со списком типовых
@@ -91,11 +514,12 @@ class HierarchicalView(QTreeView):
 
     def __init__(self, product_denotation: str,
                  reverse: bool = False,
+                 data: HierarchyData | None = None,
                  header_labels=('Индекс', 'Уровень', 'Наименование', 'Обозначение',
                                 'Тип согласно\nспецификации', 'Кол-во', 'Ед.\nизм.')):
         logging.info('Инициализация иерархического древа')
         super().__init__()
-        self.model = HierarchicalModel(product_denotation, reverse)
+        self.model = HierarchicalModel(product_denotation, reverse, data=data)
         self.model.updKttpSignal.connect(self.updKttp)
         self.model.addKttpSignal.connect(self.addKttp)
         self.model.delKttpSignal.connect(self.delKttp)
@@ -115,10 +539,7 @@ class HierarchicalView(QTreeView):
     def header_horizontal(self) -> list[str]:
         """ Список названий столбцов """
 
-        header = []
-        for column in range(self.model.columnCount()):
-            header.append(self.model.horizontalHeaderItem(column).text())
-        return header
+        return list(self.model.headers)
 
     @ header_horizontal.setter
     def header_horizontal(self, header: list[str]) -> None:
@@ -130,7 +551,9 @@ class HierarchicalView(QTreeView):
         """ Настройка внешнего вида представления """
 
         self.blockSignals(True)
-        self.expandAll()
+        if self.model.tree.complete:
+            self.expandAll()
+        self.header().setSortIndicator(-1, Qt.AscendingOrder)
         self.setSortingEnabled(True)
         self.setUniformRowHeights(False)
         self.setIndentation(20)
@@ -149,95 +572,57 @@ class HierarchicalView(QTreeView):
         for column in range(self.model.columnCount()):
             self.resizeColumnToContents(column)
 
-    @staticmethod
-    def qDataRow(data_row: list[str, int, None]) -> list[QStandardItem]:
-        """ Записывает данные в модель """
-
-        q_data_row = []
-        for item in data_row:
-            q_item = QStandardItem()
-            q_item.setData(item, Qt.DisplayRole)
-            q_data_row.append(q_item)
-        return q_data_row
-
-    def importData(self, root: QStandardItem | None = None) -> None:
+    def importData(self) -> None:
         """ Вносит в модель данные родитель: дети """
 
-        self.model.setRowCount(0)
-        if root is None:
-            root = self.model.invisibleRootItem()
-        root_branch = self.model.tree.tree_dicts[0]
-        q_data_row = self.qDataRow([None, 0,
-                                    root_branch.name,
-                                    root_branch.deno,
-                                    root_branch.child_data.child_type,
-                                    root_branch.child_data.child_quantity,
-                                    root_branch.child_data.child_unit])
-        root.appendRow(q_data_row)
-        root.child(root.rowCount() - 1).setData(root_branch.product)
-        parent = root.child(root.rowCount() - 1)
         SplashScreen().newMessage(message='Построение модели...\nВнесение дочерних изделий',
                                   log=True,
                                   logging_level='DEBUG')
-        self.addChildren(parent=parent,
-                         parent_id=root_branch.unique_id,
-                         level=0,
-                         main_index='')
-
-    def addChildren(self, parent: QStandardItem,
-                    parent_id: int,
-                    level: int,
-                    main_index: str) -> None:
-        """ Рекурсивно вносит в модель данные родитель: дети """
-
-        for branch in self.model.tree.tree_dicts:
-            if branch.parent_id == parent_id:
-                index = main_index + str(parent.rowCount() + 1) + '.'
-                self.column_settings['Индекс'] = {'data': index,
-                                                  'visible': False}
-                self.column_settings['Наименование'] = {'data': {'type': 'product',
-                                                                 'header': 'Наименование',
-                                                                 'setting': 'name'},
-                                                        'visible': True}
-                q_data_row = self.qDataRow([index, level + 1,
-                                            branch.name,
-                                            branch.deno,
-                                            branch.child_data.child_type,
-                                            branch.child_data.child_quantity,
-                                            branch.child_data.child_unit])
-                parent.appendRow(q_data_row)
-                parent.child(parent.rowCount() - 1).setData(branch.product)
-                if level < 30:
-                    self.addChildren(parent=parent.child(parent.rowCount() - 1),
-                                     parent_id=branch.unique_id,
-                                     level=level + 1,
-                                     main_index=index)
-                else:
-                    name = branch.name
-                    deno = branch.deno
-                    SplashScreen().close()
-                    show_dialog(f'Обнаружена рекурсивная зависимость в {name} {deno}')
+        self.model.initNodes()
+        nodes = self.model.tree.nodes
+        if len(nodes) > 1:
+            self.column_settings['Индекс'] = {'data': nodes[-1].index,
+                                              'visible': False}
+            self.column_settings['Наименование'] = {'data': {'type': 'product',
+                                                             'header': 'Наименование',
+                                                             'setting': 'name'},
+                                                    'visible': True}
 
-    def setExpandToLevel(self, expand_level: int) -> None:
-        """ Раскрывает представление модели до определенного уровня """
+    def expandAll(self) -> None:
+        """ Раскрывает все строки, предварительно загрузив все древо """
+
+        self.fetchAll()
+        super().expandAll()
+
+    def fetchAll(self) -> None:
+        """ Загрузка всего древа одним запросом
+            перед операциями над всем древом """
+
+        if not self.model.tree.complete:
+            self.model.fetchAll()
 
+    def setExpandToLevel(self, expand_level: int) -> None:
+        """ Раскрывает представление модели до определенного уровня.
+            Не загруженные уровни догружаются, раскрытие
+            до последнего уровня загружает все древо """
+
+        if not self.model.tree.complete:
+            if expand_level >= self.model.tree.levels[-1]:
+                self.fetchAll()
+            else:
+                self.model.fetchToLevel(level=expand_level)
         expand_level = expand_level - 1
         self.collapseAll()
         if expand_level >= 0:
             self.expandToDepth(expand_level)
 
     def addNewColumn(self, data: dict[str, str | bool | None | dict[Product, str]],
-                     modify_settings: bool = True, new_column: bool = True) -> None:
+                     modify_settings: bool = True) -> None:
         """ Добавляет новый или скрывает/показывает уже имеющийся столбец """
 
         header = data['header']
-        root = self.model.invisibleRootItem()
         if header not in self.header_horizontal:
-            column = self.model.columnCount()
-            self.getDataFromProduct(item=root,
-                                    data=data,
-                                    column=column,
-                                    new_column=new_column)
+            column = self.model.addColumn(data=data)
             self.column_settings[data['header']] = {'data': data,
                                                     'visible': True}
             if 'delegate' in data:
@@ -254,84 +639,11 @@ class HierarchicalView(QTreeView):
             self.modifyModelSettingsOnUpdate()
         self.model.updTreeView.emit()
 
-    def getDataFromProduct(self, data: dict[str, str | bool | None | dict[Product, str]],
-                           item: QStandardItem, column: int, new_column: bool) -> None:
-        """ Изменяет данные столбца, запрашивая
-            определенный аттрибут для каждой строки """
-
-        if new_column:
-            item.appendColumn([QStandardItem() for _ in range(item.rowCount())])
-        for row in range(item.rowCount()):
-            child = item.child(row)
-            data = self.addDataToModel(item=item,
-                                       child=child,
-                                       data=data,
-                                       row=row,
-                                       column=column)
-            self.getDataFromProduct(item=child,
-                                    data=data,
-                                    column=column,
-                                    new_column=new_column)
-
-    # pylint: disable=too-many-arguments
-    def addDataToModel(self, item: QStandardItem, child: QStandardItem, row: int, column: int,
-                       data: dict[str, str | bool | None | dict[Product, str]]
-                       ) -> dict[str, str | bool | None | dict[Product, str]]:
-        """ Запрос определенных аттрибутов у определенного изделия.
-            В случае, когда определенный аттрибут относиться
-            к нескольким изделиям (несколько изделий изготавливаются
-            совместно по одному технологическому процессу) вызывается
-            метод дополняющий данные аттрибутов для этих изделий """
-
-        product = child.data()
-        text = product.getData(data=data)
-        if 'sub_products' in data.keys():
-            data = self.addComplexDocumentInfo(product=product, data=data)
-            text = self.addComplexDocumentText(product=product, data=data, text=text)
-        if text is not None:
-            if isinstance(text, datetime.date) and text is not None:
-                date = QDateTime()
-                date.setSecsSinceEpoch(int(text.timestamp()))
-                text = date
-            item.child(row, column).setData(text, Qt.DisplayRole)
-        return data
-
-    @staticmethod
-    def addComplexDocumentText(product, text: str,
-                               data: dict[str, str | bool | None | dict[Product, str]]) -> str:
-        """ Дополняет данными для документов совместного изготовления """
-
-        product_dict = data['sub_products']
-        additional_text = product_dict.pop(product, None)
-        if additional_text is not None:
-            if text:
-                return '\n'.join([additional_text, text])
-            return additional_text
-        return text
-
-    def addComplexDocumentInfo(self, data: dict[str, str | bool | None | dict[Product, str]],
-                               product: Product) -> dict[str, str | bool | None | dict[Product, str]]:
-        """ Сохраняет данные об изделиях в составе составной МК """
-
-        sub_data = data.copy()
-        sub_data['setting'] = 'sub_products_new'
-        sub_data['only_text'] = False
-        documents_data = product.getData(sub_data)
-
-        if documents_data is not None:
-            for document_data in documents_data:
-                for sub_product, document in document_data:
-                    data['sub_products'][sub_product] = \
-                        self.addComplexDocumentText(
-                            product=sub_product,
-                            data=data,
-                            text=f'В составе {document.deno}')
-        return data
-
-    def findText(self, text: str, item: QStandardItem | None = None,
+    def findText(self, text: str, item: HierarchicalItem | None = None,
                  indexes: list[QModelIndex] | None = None) -> list[QModelIndex]:
         """ Возвращает список индексов по совпадению текста """
 
+        self.fetchAll()
         if indexes is None:
             indexes = []
         item = self.model.invisibleRootItem() if item is None else item
@@ -362,7 +674,7 @@ class HierarchicalView(QTreeView):
                                         flags=Qt.MatchExactly | Qt.MatchRecursive))
         return indexes
 
-    def getExpandSettings(self, item: QStandardItem | None = None) -> None:
+    def getExpandSettings(self, item: HierarchicalItem | None = None) -> None:
         """ Сохраняет какие строки скрыты/показаны """
 
         if item is None:
@@ -374,7 +686,7 @@ class HierarchicalView(QTreeView):
             self.expand_settings[code] = self.isExpanded(index)
             self.getExpandSettings(child)
 
-    def setExpandSettings(self, item: QStandardItem | None = None) -> None:
+    def setExpandSettings(self, item: HierarchicalItem | None = None) -> None:
         """ Разворачивает и сворачивает уровни """
 
         if item is None:
@@ -383,10 +695,10 @@ class HierarchicalView(QTreeView):
             child = item.child(row)
             code = item.child(row, 0).text()
             index = child.index()
-            try:
-                self.setExpanded(index, self.expand_settings[code])
-            except KeyError:
-                self.setExpanded(index, False)
+            expanded = self.expand_settings.get(code, False)
+            if expanded and self.model.canFetchMore(index):
+                self.model.fetchMore(index)
+            self.setExpanded(index, expanded)
             self.setExpandSettings(child)
 
     def customSelectedIndexes(self, column: int = 0) -> QModelIndex | None:
@@ -415,10 +727,11 @@ class HierarchicalView(QTreeView):
             но для всех видов документов, которые можно встретить
             в этом изделии и его дочерних """
 
+        self.fetchAll()
         self.blockSignals(True)
         self.getExpandSettings()
         self.collapseAll()
-        self.document_types = sorted(self.document_types, key=lambda x: x.id_type)
+        self.document_types = sorted(self.model.tree.document_types.values(), key=lambda x: x.id_type)
         logging.debug(self.document_types)
         self.addMultipleColumns()
         self.setExpandSettings()
@@ -475,12 +788,9 @@ class HierarchicalView(QTreeView):
 
         header = data['header']
         if header in self.header_horizontal:
-            root = self.model.invisibleRootItem()
             column = self.header_horizontal.index(header)
-            self.getDataFromProduct(item=root,
-                                    data=data,
-                                    column=column,
-                                    new_column=False)
+            self.model.fillColumn(column=column, data=data)
+            self.viewport().update()
 
     def redrawAllColumns(self) -> None:
         """ Обновить данные всех столбцов """
@@ -495,6 +805,7 @@ class HierarchicalView(QTreeView):
 
         product = self.selected_product
         product.updKttp(documents=documents)
+        self.model.tree.updDocumentMatrix(product=product)
         self.redrawAllColumns()
 
     def addKttp(self, documents: list) -> None:
@@ -502,6 +813,7 @@ class HierarchicalView(QTreeView):
 
         product = self.selected_product
         product.addDocument(documents[0])
+        self.model.tree.updDocumentMatrix(product=product)
         self.redrawAllColumns()
 
     def delKttp(self, documents: list) -> None:
@@ -509,6 +821,7 @@ class HierarchicalView(QTreeView):
 
         product = self.selected_product
         product.delDocument(documents[0])
+        self.model.tree.updDocumentMatrix(product=product)
         self.redrawAllColumns()
 
     def updProductKind(self, kind_name) -> None:
@@ -67,9 +67,7 @@ class ToolBarHierarchyLevels(ToolBar):
         """ Возвращает список уровней входимости
             иерархического древа """
 
-        tree_dicts = self.window_table.tree_view.model.tree.tree_dicts
-        all_levels = [branch.level for branch in tree_dicts]
-        return sorted(set(all_levels))
+        return self.window_table.tree_view.model.tree.levels
 
     def upd(self) -> None:
         """ Обновить тулбар (количество уровней может изменяться) """
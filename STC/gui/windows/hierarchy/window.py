@@ -26,6 +26,7 @@ from STC.gui.windows.hierarchy.toolbar import ToolBarProductOptions
 if TYPE_CHECKING:
     from PyQt5.Qt import QModelIndex
     from PyQt5.Qt import QPoint
+    from STC.database.database import HierarchyData
 
 
 class SettingsWindowTable:
@@ -148,11 +149,14 @@ class WindowTable(WindowBasic):
     importXl = pyqtSignal()
     importPLM = pyqtSignal()
 
-    def __init__(self, product_denotation: str, reverse: bool = False) -> None:
+    def __init__(self, product_denotation: str, reverse: bool = False,
+                 data: HierarchyData | None = None) -> None:
         super().__init__()
         self.reverse = reverse
         self.tree_view = HierarchicalView(product_denotation=product_denotation,
-                                          reverse=self.reverse)
+                                          reverse=self.reverse,
+                                          data=data)
+        self.tree_view.model.nodesInserted.connect(self.colorizeTree)
         self.mark_index = {}
         self.main_menu = None
         self.file_menu = None
@@ -333,15 +337,18 @@ class WindowTable(WindowBasic):
         action.triggered.connect(self.importPLM.emit)
         return action
 
-    def updTreeModel(self, product_denotation: str) -> None:
-        """ Обновить данные иерархического древа """
+    def updTreeModel(self, product_denotation: str, data: HierarchyData | None = None) -> None:
+        """ Обновить данные иерархического древа
+            data -> данные, загруженные в фоновом потоке """
 
         self.header_labels = self.tree_view.header_horizontal
         self.settings = SettingsWindowTable(self.tree_view)
         self.settings.getCurrentCode(self.tree_view)
         self.settings.getColumnSettings(self.tree_view)
         self.tree_view = HierarchicalView(product_denotation=product_denotation,
-                                          reverse=self.reverse)
+                                          reverse=self.reverse,
+                                          data=data)
+        self.tree_view.model.nodesInserted.connect(self.colorizeTree)
         self.main_window.setCentralWidget(self.tree_view)
         self.settings.setAdditionalColumns(self.tree_view)
         self.settings.setExpandSettings(self.tree_view)
@@ -4,193 +4,296 @@ from __future__ import annotations
 import logging
 import re
 import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
 from os import listdir
 from os import path
 from dataclasses import dataclass
+from functools import cached_property
 
 from pandas import DataFrame
 from pandas import Series
 from pandas import Timestamp
-from pandas import isnull
-from pandas import to_datetime
+from pandas import concat
 
 from STC.config.config import CFG_PLM
+from STC.database.database import DbImportFile
 from STC.functions.func import null_cleaner
+from STC.plm.plm_cache import PLMCache
+from STC.plm.plm_cache import ROW_COLUMNS
+from STC.progress.progress import PROGRESS
 
 
 class DataFromPLM:
     """ Считывает данные из выгрузок PLM """
 
-    def __init__(self) -> None:
-        document_types = {'КД': CFG_PLM.main.folder_kd,
-                          'ТД': CFG_PLM.main.folder_td}
-        self.regex = DenoRegEx()
+    def __init__(self, workers: int | None = None, full: bool = False) -> None:
+        self.directories = {'КД': CFG_PLM.main.folder_kd,
+                            'ТД': CFG_PLM.main.folder_td}
+        self.workers = workers or CFG_PLM.main.workers or None
+        self.full = full
+        self.cache = PLMCache(CFG_PLM.main.cache_file)
+        self.import_diff = None
+        self.changed = []  # считанные выгрузки
         self.products = {}
-        for document_type, directory in document_types.items():
-            self.directory = directory
-            for file in self.getExcelFiles():
-                self.plm_data = []
-                self.dataframe = None
-                logging.debug(file)
-                _, ext = path.splitext(file)
-                if ext == '.xml':
-                    self.readXlm(self.getXlmTable(file))
-                    dataframe = self.analyze(document_type=document_type)
-                    # self.doc_stages = list(dataframe['Состояние ЖЦ'].cat.categories)
-                    self.products = self.getProducts(dataframe=dataframe,
-                                                     document_type=document_type)
-
-    def analyze(self, document_type: str = 'КД') -> DataFrame:
-        """ Очищает и подготавливает данные для анализа """
-
-        if self.dataframe is None:
-            self.dataframe = DataFrame(self.plm_data)
-        else:
-            self.dataframe.append(self.plm_data)
-        self.dataframe = self.setColumnTypeDatetime(self.dataframe)
-        self.dataframe = self.setColumnTypeCategory(self.dataframe)
-        self.dataframe = self.addColumnDeno(self.dataframe, document_type)
-        self.dataframe = self.dataframe.drop(self.dataframe[isnull(self.dataframe['deno'])].index)
-        self.dataframe = self.addColumnDenoDoc(self.dataframe, document_type)
-        self.dataframe = self.dataframe.sort_values(by=['deno',
-                                                        'Номер версии',
-                                                        'Дата изменения'],
-                                                    ascending=False)
-        self.dataframe = self.dataframe.drop_duplicates(subset=['deno', 'Вид документа'])
-        # self.dataframe.to_excel('output1.xlsx', engine='xlsxwriter')
-        return self.dataframe
+        for dataframe in self.readExports().values():
+            # self.doc_stages = list(dataframe['Состояние ЖЦ'].cat.categories)
+            self.products = self.getProducts(dataframe=dataframe)
+
+    def readExports(self) -> dict[str, DataFrame]:
+        """ Считывание новых и измененных выгрузок (всех при full),
+            а также выгрузок, строк которых нет в кэше.
+            Возвращает по видам документации строки изделий,
+            данные которых могли измениться: из повторов
+            (deno, 'Вид документа') остается строка последней выгрузки """
+
+        files = {path.join(directory, file): document_type
+                 for document_type, directory in self.directories.items()
+                 for file in self.getExcelFiles(directory)
+                 if path.splitext(file)[1] == '.xml'}
+        self.import_diff = DbImportFile.diff(source='plm', paths=list(files), full=self.full)
+        hashes = self.import_diff.hashes
+        changed = set(self.import_diff.changed)
+        self.changed = [file_path for file_path in files
+                        if file_path in changed or hashes[file_path] not in self.cache.hashes]
+        DbImportFile.report(title='Выгрузки PLM',
+                            unchanged=len(files) - len(self.changed),
+                            reimported=len(self.changed),
+                            removed=len(self.import_diff.removed))
+        tasks = [(file_path, files[file_path]) for file_path in self.changed]
+        frames = dict(zip(self.changed, self.readFiles(tasks)))
+        for file_path, frame in frames.items():
+            self.cache.stage(file_hash=hashes[file_path], dataframe=frame)
+        previous = self.import_diff.previous
+        outdated = [previous[file_path] for file_path in self.changed + self.import_diff.removed
+                    if file_path in previous]
+        denos = self.cache.denos(outdated)
+        for frame in frames.values():
+            denos.update(frame['deno'])
+
+        order = {file_hash: num for num, file_hash in enumerate(hashes.values())}
+        exports = {}
+        for document_type in self.directories:
+            type_frames = [frame.assign(hash=hashes[file_path]) for file_path, frame in frames.items()
+                           if files[file_path] == document_type]
+            if not self.full:
+                cached = [hashes[file_path] for file_path in files
+                          if files[file_path] == document_type and file_path not in frames]
+                type_frames.insert(0, self.cache.rows(hashes=cached, denos=denos))
+            type_frames = [frame for frame in type_frames if not frame.empty]
+            if type_frames:
+                dataframe = concat(type_frames, ignore_index=True)
+                dataframe = dataframe.iloc[dataframe['hash'].map(order).argsort(kind='stable')]
+                exports[document_type] = dataframe.drop_duplicates(subset=['deno', 'Вид документа'],
+                                                                   keep='last')
+        return exports
+
+    def readFiles(self, tasks: list[tuple[str, str]]) -> list[DataFrame]:
+        """ Считывание и нормализация выгрузок [(путь, вид документации)]
+            в пуле процессов """
+
+        if len(tasks) <= 1 or self.workers == 1:
+            return [read_plm_export(*task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(read_plm_export, *task): task for task in tasks}
+            for num, future in enumerate(as_completed(futures)):
+                PROGRESS.step(message=f'Считывание {path.basename(futures[future][0])}',
+                              stage=num,
+                              stages=len(tasks))
+            return [future.result() for future in futures]
+
+    def saveCache(self) -> None:
+        """ Сохранение кэша считанных выгрузок и манифеста импорта
+            (после успешного внесения данных в БД) """
+
+        self.cache.save(keep=set(self.import_diff.hashes.values()))
+        DbImportFile.markApplied(source='plm',
+                                 removed=self.import_diff.removed,
+                                 reimported=self.changed)
 
-    def getExcelFiles(self) -> list[str]:
+    @staticmethod
+    def getExcelFiles(directory: str) -> list[str]:
         """ Возвращает сортированный список файлов в директории
             (Названия PLM выгрузок состоят из дат выгрузок)"""
-        files = listdir(self.directory)
+        files = listdir(directory)
         list_of_files = sorted(files)
         return list_of_files
 
-    def getXlmTable(self, file: str) -> ET.Element:
-        """ Считывание данных из xlm """
-
-        tree = ET.parse(path.join(self.directory, file))
-        root = tree.getroot()
-        table = root[2][0]
-        return table
-
-    def readXlm(self, table: ET.Element) -> None:
-        """ Считывание данных из xlm """
-
-        for row in table:
-            product_data = {}
-            for cell_num, cell in enumerate(row):
-                try:
-                    value = str(cell[0].text)
-                except IndexError:
-                    value = None
-                prop = str(table[0][cell_num][0].text)
-                product_data.update({prop: value})
-            if product_data[prop] != prop:
-                self.plm_data.append(product_data)
-
-    def getProducts(self, dataframe: DataFrame, document_type: str) -> dict[str, PLMProduct]:
+    def getProducts(self, dataframe: DataFrame) -> dict[str, PLMProduct]:
         """ Возвращает словарь экземпляров промежуточного класса PLMProduct
             для хранения данных об уникальных изделиях и документах
             с ними связанных """
 
-        row_with_name = 'Имя'
-        if document_type == 'ТД':
-            row_with_name = 'Наименование'
-        for _, row in dataframe.iterrows():
+        columns = {col_name: dataframe[col_name].tolist()
+                   for col_name in ['Вид документа', 'deno_doc', 'name', 'Файл',
+                                    'Состояние ЖЦ', 'Создал', 'Изменил',
+                                    'Дата создания', 'Дата изменения']}
+        for deno, rows in dataframe.groupby('deno', sort=False).indices.items():
             try:
-                plm_product = self.products[row['deno']]
+                plm_product = self.products[deno]
             except KeyError:
-                plm_product = PLMProduct(row['deno'])
-                self.products.update({row['deno']: plm_product})
-            plm_product.name = row[row_with_name]
-            plm_document = self.getDocument(row=row,
-                                            row_with_name=row_with_name)
-            plm_product.setDocument(plm_document)
+                plm_product = PLMProduct(deno)
+                self.products.update({deno: plm_product})
+            plm_product.name = columns['name'][rows[-1]]
+            for row in rows:
+                plm_product.setDocument(self.getDocument(columns=columns, row=row))
         return self.products
 
-    def getDocument(self, row, row_with_name: str) -> PLMDocument:
+    @staticmethod
+    def getDocument(columns: dict[str, list], row: int) -> PLMDocument:
         """ Возвращает документ, составленный из реквизитов документа
-            указанных в строке """
+            указанных в строке row столбцов columns """
 
-        deno_doc = self.denoCleaner(row=row)
         doc_lifecycle = \
             PLMDocumentLifeCycle(
-                stage=null_cleaner(row['Состояние ЖЦ']),
-                name_created=row['Создал'],
-                name_changed=row['Изменил'],
-                date_created=to_datetime(row['Дата создания'],
-                                         unit='s',
-                                         origin='unix'),
-                date_changed=to_datetime(row['Дата изменения'],
-                                         unit='s',
-                                         origin='unix'))
-
-        document = PLMDocument(d_type=row['Вид документа'],
-                               deno=deno_doc,
-                               name=row[row_with_name],
-                               file_name=row['Файл'],
+                stage=null_cleaner(columns['Состояние ЖЦ'][row]),
+                name_created=columns['Создал'][row],
+                name_changed=columns['Изменил'][row],
+                date_created=columns['Дата создания'][row],
+                date_changed=columns['Дата изменения'][row])
+
+        document = PLMDocument(d_type=columns['Вид документа'][row],
+                               deno=columns['deno_doc'][row],
+                               name=columns['name'][row],
+                               file_name=columns['Файл'][row],
                                lifecycle=doc_lifecycle)
         return document
 
+
+class PLMExport:
+    """ Считывает и нормализует одну выгрузку PLM """
+
+    def __init__(self, file_path: str, document_type: str) -> None:
+        self.file_path = file_path
+        self.document_type = document_type
+        self.regex = DenoRegEx()
+        self.plm_data = {}
+        self.dataframe = None
+
+    def read(self) -> DataFrame:
+        """ Нормализованные данные выгрузки:
+            только столбцы, необходимые для внесения в БД
+            (наименование - в столбце name) """
+
+        logging.debug(self.file_path)
+        self.readXlm()
+        dataframe = self.analyze(document_type=self.document_type)
+        row_with_name = 'Наименование' if self.document_type == 'ТД' else 'Имя'
+        dataframe = dataframe.rename(columns={row_with_name: 'name'})
+        return dataframe[ROW_COLUMNS]
+
+    def analyze(self, document_type: str = 'КД') -> DataFrame:
+        """ Очищает и подготавливает данные для анализа """
+
+        self.dataframe = DataFrame(self.plm_data)
+        self.dataframe = self.setColumnTypeDatetime(self.dataframe)
+        self.dataframe = self.setColumnTypeCategory(self.dataframe)
+        self.dataframe = self.addColumnDeno(self.dataframe, document_type)
+        self.dataframe = self.dataframe.dropna(subset=['deno'])
+        self.dataframe = self.addColumnDenoDoc(self.dataframe, document_type)
+        self.dataframe = self.dataframe.sort_values(by=['deno',
+                                                        'Номер версии',
+                                                        'Дата изменения'],
+                                                    ascending=False)
+        self.dataframe = self.dataframe.drop_duplicates(subset=['deno', 'Вид документа'])
+        # self.dataframe.to_excel('output1.xlsx', engine='xlsxwriter')
+        return self.dataframe
+
+    def readXlm(self) -> None:
+        """ Потоковое считывание таблицы выгрузки PLM в столбцы
+            {реквизит: [значения]}. Строки, совпадающие с заголовком,
+            пропускаются """
+
+        rows = self.iterXlmRows(self.file_path)
+        header = next(rows, [])
+        # при повторе названия реквизита берется последний столбец
+        columns = {prop: num for num, prop in enumerate(header)}
+        self.plm_data = {prop: [] for prop in columns}
+        for values in rows:
+            if not values or values[-1] == header[len(values) - 1]:
+                continue
+            for prop, num in columns.items():
+                self.plm_data[prop].append(values[num] if num < len(values) else None)
+
+    @staticmethod
+    def iterXlmRows(file_path: str) -> Iterator[list[str | None]]:
+        """ Значения ячеек строк таблицы выгрузки (первая строка - заголовок).
+            Таблица - первый элемент третьего дочернего элемента корня
+            (Workbook/Worksheet/Table). Xml считывается потоково,
+            обработанные строки удаляются из дерева """
+
+        table_path = [0, 2, 0]
+        positions = []  # позиции открытых элементов среди соседних
+        children = [0]  # количество начатых дочерних элементов открытых элементов
+        table = None
+        for event, element in ET.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                positions.append(children[-1])
+                children[-1] += 1
+                children.append(0)
+                if positions == table_path:
+                    table = element
+                continue
+            if table is not None and len(positions) == 4 and positions[:3] == table_path:
+                yield [str(cell[0].text) if len(cell) else None for cell in element]
+                table.remove(element)
+            positions.pop()
+            children.pop()
+            if element is table:
+                return
+
     def addColumnDeno(self, dataframe: DataFrame, document_type: str) -> DataFrame:
-        """ Добавляет столбец с децимальным номером изделия """
+        """ Добавляет столбец с децимальным номером изделия.
+            Для ТД номер ищется в имени, а при отсутствии - в названии файла """
 
         if document_type == 'КД':
-            dataframe['deno'] = dataframe['Имя'].str.extract(self.regex.regex_kd)
+            dataframe['deno'] = dataframe['Имя'].str.extract(self.regex.re_kd, expand=False)
         elif document_type == 'ТД':
-            dataframe['deno'] = dataframe['Имя']
-            for row in dataframe.itertuples():
-                index = row.Index
-                deno = re.findall(self.regex.regex_td,
-                                  dataframe.loc[index, 'Имя'])
-                if not deno and dataframe.loc[index, 'Файл']:
-                    deno = re.findall(self.regex.regex_td,
-                                      dataframe.loc[index, 'Файл'])
-                dataframe.loc[index, 'deno'] = deno[0] if deno else None
+            dataframe['deno'] = self.extractFromNameOrFile(dataframe, self.regex.re_td)
         return dataframe
 
     def addColumnDenoDoc(self, dataframe: DataFrame, document_type: str) -> DataFrame:
         """ Добавляет столбец с децимальным номером документа """
         if document_type == 'КД':
-            return self.addColumnDenoDocKD(dataframe)
-        return self.addColumnDenoDocTD(dataframe)
+            dataframe = self.addColumnDenoDocKD(dataframe)
+        else:
+            dataframe = self.addColumnDenoDocTD(dataframe)
+        return self.denoCleaner(dataframe)
 
     def addColumnDenoDocKD(self, dataframe: DataFrame) -> DataFrame:
         """ Добавляет столбец с децимальным номером
             документа конструкторской документации """
 
-        dataframe['deno_doc'] = dataframe['Имя'].str.extract(self.regex.regex_kd)
-        dataframe['Имя'].replace(self.regex.regex_name_cleaner,
-                                 '', regex=True, inplace=True)
-        dataframe['Имя'].replace(self.regex.space_start,
-                                 '', regex=True, inplace=True)
+        dataframe['deno_doc'] = dataframe['Имя'].str.extract(self.regex.re_kd, expand=False)
+        dataframe['Имя'] = dataframe['Имя'].replace(self.regex.re_name_cleaner, '', regex=True)
+        dataframe['Имя'] = dataframe['Имя'].replace(self.regex.re_space_start, '', regex=True)
         return dataframe
 
     def addColumnDenoDocTD(self, dataframe: DataFrame) -> DataFrame:
         """ Добавляет столбец с децимальным номером
             документа технологической документации """
 
-        dataframe['deno_doc'] = dataframe['Имя']
-        for row in dataframe.itertuples():
-            index = row.Index
-            deno = re.findall(self.regex.regex_td_doc,
-                              dataframe.loc[index, 'Имя'])
-            if not deno:
-                deno = re.findall(self.regex.regex_td_doc,
-                                  dataframe.loc[index, 'Файл'])
-            dataframe.loc[index, 'deno_doc'] = deno[0] if deno else None
+        dataframe['deno_doc'] = self.extractFromNameOrFile(dataframe, self.regex.re_td_doc)
         return dataframe
 
     @staticmethod
-    def denoCleaner(row: Series) -> str:
+    def extractFromNameOrFile(dataframe: DataFrame, pattern: re.Pattern) -> Series:
+        """ Первое совпадение с шаблоном в имени документа,
+            а если его нет - в названии файла """
+
+        from_name = dataframe['Имя'].str.extract(pattern, expand=False)
+        from_file = dataframe['Файл'].str.extract(pattern, expand=False)
+        return from_name.fillna(from_file)
+
+    @staticmethod
+    def denoCleaner(dataframe: DataFrame) -> DataFrame:
         """ Очистка децимальных номеров неправильных форматов """
 
-        text = str(row['deno_doc'])
-        if text[-2:] == 'СП':
-            return text[:-2]
-        return row['deno_doc']
+        deno_doc = dataframe['deno_doc']
+        dataframe['deno_doc'] = deno_doc.mask(deno_doc.str.endswith('СП', na=False),
+                                              deno_doc.str[:-2])
+        return dataframe
 
     @staticmethod
     def setColumnTypeCategory(dataframe: DataFrame) -> DataFrame:
@@ -215,6 +318,11 @@ class DataFromPLM:
         return dataframe
 
 
+def read_plm_export(file_path: str, document_type: str) -> DataFrame:
+    """ Считывание одной выгрузки PLM (выполняется в процессе пула) """
+    return PLMExport(file_path=file_path, document_type=document_type).read()
+
+
 class PLMProduct:
     """ Отображает свойства изделия, полученные
         при анализе реквизитов документов в PLM """
@@ -342,3 +450,28 @@ class DenoRegEx:
     def regex_td_doc(self):
         """ Децимальный номер документа ТД """
         return fr'{self.deno_r_td}'
+
+    @cached_property
+    def re_kd(self) -> re.Pattern:
+        """ Скомпилированный regex_kd """
+        return re.compile(self.regex_kd)
+
+    @cached_property
+    def re_td(self) -> re.Pattern:
+        """ Скомпилированный regex_td """
+        return re.compile(self.regex_td)
+
+    @cached_property
+    def re_td_doc(self) -> re.Pattern:
+        """ Скомпилированный regex_td_doc (с группой для str.extract) """
+        return re.compile(f'({self.regex_td_doc})')
+
+    @cached_property
+    def re_name_cleaner(self) -> re.Pattern:
+        """ Скомпилированный regex_name_cleaner """
+        return re.compile(self.regex_name_cleaner)
+
+    @cached_property
+    def re_space_start(self) -> re.Pattern:
+        """ Скомпилированный space_start """
+        return re.compile(self.space_start)
@@ -0,0 +1,92 @@
+""" Кэш нормализованных данных выгрузок PLM.
+
+    Выгрузки PLM не изменяются после создания, поэтому при синхронизации
+    считываются только новые и измененные файлы (по манифесту импорта
+    DbImportFile), а данные остальных берутся из локальной БД SQLite
+    (CFG_PLM.main.cache_file). Строки хранятся по хэшу содержимого
+    выгрузки, поэтому кэш не расходится с манифестом: выгрузка,
+    строк которой нет в кэше, считывается заново """
+
+from __future__ import annotations
+import sqlite3
+
+from pandas import DataFrame
+from pandas import read_sql
+
+
+DATE_COLUMNS = ['Дата создания', 'Дата изменения']
+ROW_COLUMNS = ['deno', 'deno_doc', 'Вид документа', 'name', 'Файл',
+               'Состояние ЖЦ', 'Создал', 'Изменил'] + DATE_COLUMNS
+
+
+class PLMCache:
+    """ Нормализованные строки выгрузок по хэшу их содержимого """
+
+    def __init__(self, file_name: str) -> None:
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS plm_export (hash TEXT PRIMARY KEY)')
+        columns = ', '.join(f'"{column}"' for column in ['hash'] + ROW_COLUMNS)
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS plm_export_row ({columns})')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS ix_plm_export_row_hash '
+                                'ON plm_export_row (hash)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS ix_plm_export_row_deno '
+                                'ON plm_export_row (deno)')
+        self.connection.commit()
+        self.hashes = {row[0] for row in self.connection.execute('SELECT hash FROM plm_export')}
+        self.new_rows = {}  # {хэш: DataFrame} нормализованные строки считанных выгрузок
+
+    def setTempTable(self, name: str, column: str, values: set[str] | list[str]) -> None:
+        """ Временная таблица значений для отбора строк кэша """
+
+        self.connection.execute(f'CREATE TEMP TABLE IF NOT EXISTS {name} ({column} TEXT PRIMARY KEY)')
+        self.connection.execute(f'DELETE FROM {name}')
+        self.connection.executemany(f'INSERT OR IGNORE INTO {name} VALUES (?)',
+                                    [(value,) for value in values])
+
+    def denos(self, hashes: list[str]) -> set[str]:
+        """ Изделия из кэша выгрузок с хэшами hashes """
+
+        self.setTempTable(name='plm_hash', column='hash', values=hashes)
+        query = 'SELECT DISTINCT deno FROM plm_export_row ' \
+                'WHERE hash IN (SELECT hash FROM plm_hash)'
+        return {row[0] for row in self.connection.execute(query)}
+
+    def rows(self, hashes: list[str], denos: set[str]) -> DataFrame:
+        """ Строки кэша выгрузок с хэшами hashes
+            по изделиям denos в порядке внесения """
+
+        self.setTempTable(name='plm_hash', column='hash', values=hashes)
+        self.setTempTable(name='plm_deno', column='deno', values=denos)
+        query = 'SELECT plm_export_row.* FROM plm_export_row ' \
+                'JOIN plm_hash ON plm_hash.hash = plm_export_row.hash ' \
+                'JOIN plm_deno ON plm_deno.deno = plm_export_row.deno ' \
+                'ORDER BY plm_export_row.rowid'
+        return read_sql(query, self.connection, parse_dates=DATE_COLUMNS)
+
+    def stage(self, file_hash: str, dataframe: DataFrame) -> None:
+        """ Нормализованные строки считанной выгрузки
+            для сохранения в кэш """
+
+        self.new_rows[file_hash] = dataframe
+
+    def save(self, keep: set[str]) -> None:
+        """ Сохранение строк считанных выгрузок и удаление
+            строк выгрузок, которых больше нет (не входят в keep).
+            Вызывается после успешного внесения данных в БД """
+
+        with self.connection:
+            for file_hash in (self.hashes - keep) | set(self.new_rows):
+                self.connection.execute('DELETE FROM plm_export_row WHERE hash = ?', (file_hash,))
+                self.connection.execute('DELETE FROM plm_export WHERE hash = ?', (file_hash,))
+            for file_hash, dataframe in self.new_rows.items():
+                dataframe = dataframe[ROW_COLUMNS].copy()
+                dataframe.insert(0, 'hash', file_hash)
+                dataframe.to_sql('plm_export_row', self.connection, if_exists='append', index=False)
+                self.connection.execute('INSERT INTO plm_export VALUES (?)', (file_hash,))
+        self.hashes = (self.hashes & keep) | set(self.new_rows)
+        self.new_rows = {}
+
+    def close(self) -> None:
+        """ Закрытие соединения с кэшем """
+
+        self.connection.close()
@@ -9,7 +9,7 @@ from STC.database.database import DbDocumentReal
 from STC.database.database import DbHierarchy
 from STC.database.database import DbPrimaryApplication
 from STC.database.database import DbDocumentTdComplex
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 from STC.gui.windows.document_add_new.window import WindowNewDocument
 
 from STC.product.product import ProductBuilder
@@ -41,12 +41,12 @@ class DocumentFromForm:
         elif self.document_type.class_name == 'ТД':
             self.addComplex()
         self.product_main.updDocuments()
-        SplashScreen().newMessage(message='Документ внесен',
-                                  stage=7,
-                                  stages=7,
-                                  log=True,
-                                  logging_level='INFO')
-        SplashScreen().closeWithWindow()
+        PROGRESS.newMessage(message='Документ внесен',
+                            stage=7,
+                            stages=7,
+                            log=True,
+                            logging_level='INFO')
+        PROGRESS.closeWithWindow()
 
     @staticmethod
     def mainProduct(db_product: DbProduct) -> Product:
@@ -61,11 +61,11 @@ class DocumentFromForm:
         """ Создание изделий из данных формы ввода и
             внесение изделий в БД"""
 
-        SplashScreen().newMessage(message='Внесение изделий',
-                                  stage=0,
-                                  stages=7,
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Внесение изделий',
+                            stage=0,
+                            stages=7,
+                            log=True,
+                            logging_level='INFO')
         self.addProductPrimary()
         self.addProductMain()
         self.addProductChildren()
@@ -77,7 +77,7 @@ class DocumentFromForm:
 
         product_primary_deno = self.window.structure.main_data.product_primary_application
         if product_primary_deno:
-            SplashScreen().newMessage(
+            PROGRESS.newMessage(
                 message=f'Внесение изделия первичной применяемости {product_primary_deno}',
                 log=True,
                 logging_level='INFO')
@@ -87,9 +87,9 @@ class DocumentFromForm:
     def addProductMain(self) -> None:
         """ Считывание реквизитов изделия, к которому относиться документ в форме ввода"""
 
-        SplashScreen().newMessage(message='Внесение основного изделия',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Внесение основного изделия',
+                            log=True,
+                            logging_level='INFO')
         product_main = {'deno': self.window.structure.main_data.product_deno,
                         'name': self.window.structure.main_data.product_name,
                         'date_check': datetime.now(),
@@ -105,7 +105,7 @@ class DocumentFromForm:
             for child_data in self.window.structure.spec_products.getData():
                 child_deno = child_data['Обозначение']
                 child_name = child_data['Наименование']
-                SplashScreen().newMessage(
+                PROGRESS.newMessage(
                     message=f'Внесение дочернего изделия {child_deno} {child_name}',
                     log=True,
                     upd_bar=False,
@@ -122,10 +122,10 @@ class DocumentFromForm:
         if self.document_type.subtype_name == 'Спецификация':
             for child_data in self.window.structure.spec_products_no_deno.getData():
                 child_name = child_data['Наименование']
-                SplashScreen().newMessage(message=f'Внесение дочернего изделия {child_name}',
-                                          log=True,
-                                          upd_bar=False,
-                                          logging_level='INFO')
+                PROGRESS.newMessage(message=f'Внесение дочернего изделия {child_name}',
+                                    log=True,
+                                    upd_bar=False,
+                                    logging_level='INFO')
                 product_child = {'deno': child_name,
                                  'name': child_name}
                 self.products[child_name] = product_child
@@ -135,9 +135,9 @@ class DocumentFromForm:
             являющимся первичной применяемостью """
 
         try:
-            SplashScreen().newMessage(message='Привязка первичной применяемости',
-                                      log=True,
-                                      logging_level='INFO')
+            PROGRESS.newMessage(message='Привязка первичной применяемости',
+                                log=True,
+                                logging_level='INFO')
             self.product_primary = self.products['primary_deno']['db_product']
             DbPrimaryApplication.addDbPrimaryApplication(parent=self.product_primary,
                                                          child=self.product_main.db_product)
@@ -149,9 +149,9 @@ class DocumentFromForm:
             дочерних изделий в случае если документ
             является спецификацией """
 
-        SplashScreen().newMessage(message='Привязка дочерних изделий',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Привязка дочерних изделий',
+                            log=True,
+                            logging_level='INFO')
         hierarchies = {}
         children = []
         for child_data in self.getData():
@@ -182,9 +182,9 @@ class DocumentFromForm:
             документе, в случае технологических документов
             относящихся сразу к нескольким изделиям """
 
-        SplashScreen().newMessage(message='Привязка совместно изготавливаемых',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Привязка совместно изготавливаемых',
+                            log=True,
+                            logging_level='INFO')
         builder = ProductBuilder()
         children = []
 
@@ -223,9 +223,9 @@ class DocumentFromForm:
                 date_changed = datetime.strptime(date_changed, '%d.%m.%Y %H:%M')
             except ValueError:
                 date_changed = None
-        SplashScreen().newMessage(message='Подготовка основного документа',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Подготовка основного документа',
+                            log=True,
+                            logging_level='INFO')
         document = {'document_type': self.document_type,
                     'document_deno': document_deno,
                     'document_name': document_name,
@@ -239,9 +239,9 @@ class DocumentFromForm:
         """ Внесение в БД дополнительных документов, в
             случае если вносимый документ является спецификацией """
 
-        SplashScreen().newMessage(message='Внесение документов из спецификации',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Внесение документов из спецификации',
+                            log=True,
+                            logging_level='INFO')
         for subtype_name in self.window.structure.spec_documents.getData():
             document_type = return_document_type(class_name='КД', subtype_name=subtype_name)
             document_deno = self.product_main.deno + document_type.sign
@@ -254,7 +254,7 @@ class DocumentFromForm:
         """ Аннулирование конструкторских документов, привязанных
             к изделию, но отсутствующих в спецификации """
 
-        SplashScreen().newMessage(
+        PROGRESS.newMessage(
             message='Аннулирование документов КД отсутствующих в спецификации',
             log=True,
             logging_level='INFO')
@@ -272,8 +272,8 @@ class DocumentFromForm:
     def setDocumentType(self) -> DocumentType:
         """ Определение типа документа """
 
-        SplashScreen().newMessage(message='Определение типа документа',
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Определение типа документа',
+                            log=True,
+                            logging_level='INFO')
         document_type = self.window.structure.main_data.d_type
         return document_type
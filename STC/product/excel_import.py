@@ -2,19 +2,24 @@
 # pylint: disable=invalid-name
 
 import logging
+from os import path
+
+from STC.database.database import DbConnection
 from STC.database.database import DbDocument
 from STC.database.database import DbDocumentReal
 from STC.database.database import DbDocumentTdComplex
 from STC.database.database import DbExcelProject
 from STC.database.database import DbHierarchy
+from STC.database.database import DbImportFile
 from STC.database.database import DbMkExcel
 from STC.database.database import DbMkExcelSentences
 from STC.database.database import DbPrimaryApplication
 from STC.database.database import DbProduct
 from STC.excel.xl_import.hierarchy import ExcelData
 from STC.excel.xl_import.document_db import ExcelRawDataFromTdDb
+from STC.excel.xl_import.document_db import journal_path
 from STC.functions.func import is_complex
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 from STC.product.product import DocumentTypeBuilder
 from STC.product.product import return_document_type
 
@@ -40,42 +45,61 @@ class ExcelSync:
         ExcelProduct.document_signs = ['СП','СБ','Э4']
         ExcelProduct.subproducts = [ExcelSubProduct1, ExcelSubProduct2, ExcelSubProduct3]"""
 
-    def __init__(self, upd: bool = False) -> None:
+    def __init__(self, upd: bool = False, full: bool = False) -> None:
+        """ upd -> обновить структуру изделий (таблицы считываются,
+            даже если не изменились с прошлого импорта)
+            full -> считать все таблицы заново, без кэша """
         self.document_type_builder = DocumentTypeBuilder()
-        stages = 10
-        SplashScreen().newMessage(message='Импорт данных Excel...', stage=0, stages=stages)
-        self.excel_data = ExcelData()
-
-        DbPrimaryApplication.updData()
-        DbHierarchy.updData()
-        DbExcelProject.updData()
-        DbDocument.updData()
-        DbDocumentReal.updData()
-        DbMkExcel.updData()
-        DbMkExcelSentences.updData()
-
-        SplashScreen().newMessage(message='Внесение первичных применяемостей как изделий...')
-        self.addProductsPrimaryApplication()
-
-        SplashScreen().newMessage(message='Внесение изделий...')
-        self.addProducts()
-
-        SplashScreen().newMessage(message='Привязка первичных применяемостей...')
-        self.addPrimaryApplication()
-
-        SplashScreen().newMessage(message='Привязка дочерних изделий...')
-        self.addChildren(upd=upd)
-
-        SplashScreen().newMessage(message='Внесение документов по спецификациям...')
-        self.addDocumentsKD()
-
-        SplashScreen().newMessage(message='Внесение технологических документов...')
-        self.addExcelDocumentTdFromProjects()
-        self.addExcelMkData()
-
-        SplashScreen().newMessage(message='Внесение проектов...')
-        self.addExcelProjects()
-        SplashScreen().closeWithWindow()
+        stages = 11
+        with PROGRESS.stageTimer(message='Импорт данных Excel...', stage=0, stages=stages):
+            self.excel_data = ExcelData(merge=False, full=full, skip_unchanged=not upd)
+        if self.excel_data.tables is None:
+            if DbConnection.dry_run_transaction is None:
+                self.excel_data.saveManifest()
+            PROGRESS.closeWithWindow()
+            return
+
+        # таблицы проектов считываются в пуле процессов
+        # одновременно с загрузкой данных из БД
+        try:
+            with PROGRESS.stageTimer(message='Загрузка данных из БД...'):
+                DbPrimaryApplication.updData()
+                DbHierarchy.updData()
+                DbExcelProject.updData()
+                DbDocument.updData()
+                DbDocumentReal.updData()
+                DbMkExcel.updData()
+                DbMkExcelSentences.updData()
+
+            with PROGRESS.stageTimer(message='Объединение данных таблиц проектов...'):
+                self.excel_data.merge()
+        finally:
+            self.excel_data.tables.close()
+
+        with PROGRESS.stageTimer(message='Внесение первичных применяемостей как изделий...'):
+            self.addProductsPrimaryApplication()
+
+        with PROGRESS.stageTimer(message='Внесение изделий...'):
+            self.addProducts()
+
+        with PROGRESS.stageTimer(message='Привязка первичных применяемостей...'):
+            self.addPrimaryApplication()
+
+        with PROGRESS.stageTimer(message='Привязка дочерних изделий...'):
+            self.addChildren(upd=upd)
+
+        with PROGRESS.stageTimer(message='Внесение документов по спецификациям...'):
+            self.addDocumentsKD()
+
+        with PROGRESS.stageTimer(message='Внесение технологических документов...'):
+            self.addExcelDocumentTdFromProjects()
+            self.addExcelMkData()
+
+        with PROGRESS.stageTimer(message='Внесение проектов...'):
+            self.addExcelProjects()
+        if DbConnection.dry_run_transaction is None:
+            self.excel_data.saveManifest()
+        PROGRESS.closeWithWindow()
 
     def addProductsPrimaryApplication(self) -> None:
         """ Вносит первичную применяемость изделия в таблицу Product в БД
@@ -128,7 +152,8 @@ class ExcelSync:
     def addChildren(self, upd) -> None:
         """ Вносит дочерние изделия в таблицу Product и
             вносит запись об их вхождении, типе и количестве в
-            родительское изделие в таблицу Hierarchy. """
+            родительское изделие в таблицу Hierarchy
+            (одним набором пакетных запросов для всех родителей). """
         hierarchies = {}
         for excel_product in self.excel_data.products.values():
             if excel_product.is_new:
@@ -143,7 +168,7 @@ class ExcelSync:
                     hierarchies[excel_product.product] = {'parent': excel_product.product,
                                                           'products': children}
         if hierarchies:
-            DbHierarchy.addDbHierarchies(hierarchies=hierarchies)
+            DbHierarchy.syncHierarchies(hierarchies=hierarchies)
 
     def addDocumentsKD(self) -> None:
         """ Определяет вид документа по обозначению и вносит документ в БД """
@@ -248,86 +273,87 @@ class ExcelDataFromTdDb:
     """ Обновляет и вносит данные в БД из
         файла "База ТД.xlsm" """
 
-    def __init__(self) -> None:
+    def __init__(self, full: bool = False) -> None:
+        """ full -> внести данные журнала, даже если он
+            не изменился с прошлого импорта """
         self.complex_documents = {}
         self.documents_real = {}
         self.documents = {}
-        DbProduct.updData()
-        DbDocument.updData()
-        DbDocumentReal.updData()
-        self.excel_data = ExcelRawDataFromTdDb()
-        self.addExcelProduct()
-        self.addDocumentReal()
-        self.addDocument()
-        self.addDocumentComplex()
+        import_diff = None
+        if path.isfile(journal_path()):
+            import_diff = DbImportFile.diff(source='td', paths=[journal_path()], full=full)
+            DbImportFile.report(title='Журнал ТД',
+                                unchanged=len(import_diff.unchanged),
+                                reimported=len(import_diff.changed),
+                                removed=len(import_diff.removed))
+            if not import_diff.changed:
+                DbImportFile.markApplied(source='td', removed=import_diff.removed, reimported=[])
+                PROGRESS.close()
+                return
+        with PROGRESS.stageTimer(message='Загрузка данных из БД...'):
+            DbProduct.updData()
+            DbDocument.updData()
+            DbDocumentReal.updData()
+        with PROGRESS.stageTimer(message='Считывание журнала технологических документов...'):
+            self.excel_data = ExcelRawDataFromTdDb()
+            self.table = self.excel_data.documents
+        with PROGRESS.stageTimer(message='Внесение изделий...'):
+            self.addExcelProduct()
+        with PROGRESS.stageTimer(message='Внесение документов...'):
+            self.addDocumentReal()
+        with PROGRESS.stageTimer(message='Привязка документов к изделиям...'):
+            self.addDocument()
+        with PROGRESS.stageTimer(message='Внесение составных технологических процессов...'):
+            self.addDocumentComplex()
+        if import_diff is not None:
+            DbImportFile.markApplied(source='td',
+                                     removed=import_diff.removed,
+                                     reimported=import_diff.changed)
 
     def addExcelProduct(self) -> None:
-        """ Внесение изделий в БД """
-        products = {}
-        for num, excel_document in enumerate(self.excel_data.documents):
-            SplashScreen().newMessage(message=f'Подготовка изделий...\n'
-                                              f'{excel_document.product.deno}',
-                                      upd_bar=False)
-            SplashScreen().changeSubProgressBar(stage=num,
-                                                stages=len(self.excel_data.documents))
-            product = {'deno': excel_document.product.deno,
-                       'name': excel_document.product.name}
-            products[excel_document.product.deno] = product
-        SplashScreen().close()
+        """ Внесение изделий в БД (наименование - из последней
+            регистрации изделия в журнале) """
+        products = {deno: {'deno': deno, 'name': name}
+                    for deno, name in zip(self.table['deno_kd'], self.table['name'])}
         products = DbProduct.addDbProducts(products=products, in_cache=True)
-        for excel_document in self.excel_data.documents:
-            excel_document.db_product = products[excel_document.product.deno]['db_product']
+        self.table['db_product'] = self.table['deno_kd'].map(
+            {deno: product['db_product'] for deno, product in products.items()})
 
     def addDocumentReal(self) -> None:
-        """ Внесение документов В БД """
-        for num, excel_document in enumerate(self.excel_data.documents):
-            SplashScreen().newMessage(message=f'Подготовка документов этап 1 ...\n'
-                                              f'{excel_document.document.deno} ',
-                                      upd_bar=False)
-            SplashScreen().changeSubProgressBar(stage=num,
-                                                stages=len(self.excel_data.documents))
-            excel_document.document_type = return_document_type(deno=excel_document.document.deno)
-            excel_document.document.complex = False
-            excel_document.deno_error = False
-            if excel_document.document_type is None:
-                excel_document.deno_error = True
-            else:
-                excel_document.document.complex = is_complex(deno=excel_document.document.deno)
-                if excel_document.document.complex:
-                    parent_deno_td = excel_document.document.deno.replace(' ', '')[len('Всоставе'):]
-                    try:
-                        self.complex_documents[parent_deno_td].append(excel_document.db_product)
-                    except KeyError:
-                        self.complex_documents[parent_deno_td] = [excel_document.db_product]
-                else:
-                    document = {'document_type': excel_document.document_type,
-                                'document_deno': excel_document.document.deno,
-                                'document_name': excel_document.product.name,
-                                'document_stage': excel_document.document.stage,
-                                'name_created': excel_document.reg_person.fio}
-                    self.documents_real[excel_document.document.deno] = document
-        SplashScreen().close()
+        """ Внесение документов В БД. Тип документа определяется
+            один раз для каждого обозначения """
+        denos = self.table['deno_td']
+        document_types = {deno: return_document_type(deno=deno) for deno in denos.unique()}
+        self.table['document_type'] = denos.map(document_types)
+        complex_denos = {deno for deno, document_type in document_types.items()
+                         if document_type is not None and is_complex(deno=deno)}
+        self.table['deno_error'] = self.table['document_type'].isna()
+        self.table['complex'] = denos.isin(complex_denos)
+
+        complex_rows = self.table[self.table['complex']]
+        parent_denos = complex_rows['deno_td'].str.replace(' ', '').str[len('Всоставе'):]
+        for parent_deno_td, db_product in zip(parent_denos, complex_rows['db_product']):
+            self.complex_documents.setdefault(parent_deno_td, []).append(db_product)
+
+        rows = self.table[~self.table['complex'] & ~self.table['deno_error']]
+        for deno, document_type, name, stage, fio in zip(rows['deno_td'], rows['document_type'],
+                                                         rows['name'], rows['stage'],
+                                                         rows['reg_fio']):
+            self.documents_real[deno] = {'document_type': document_type,
+                                         'document_deno': deno,
+                                         'document_name': name,
+                                         'document_stage': stage,
+                                         'name_created': fio}
         self.documents_real = DbDocumentReal.addDbDocuments(documents=self.documents_real)
-        for excel_document in self.excel_data.documents:
-            try:
-                excel_document.db_document_real = \
-                    self.documents_real[excel_document.document.deno]['document_real']
-            except KeyError:
-                pass
+        self.table['db_document_real'] = denos.map(
+            {deno: document['document_real'] for deno, document in self.documents_real.items()})
 
     def addDocument(self) -> None:
         """ Внесение связей документов и изделий в БД """
-        for num, excel_document in enumerate(self.excel_data.documents):
-            SplashScreen().newMessage(message=f'Подготовка документов этап 2 ...\n'
-                                              f'{excel_document.document.deno}',
-                                      upd_bar=False)
-            SplashScreen().changeSubProgressBar(stage=num,
-                                                stages=len(self.excel_data.documents))
-            if not excel_document.document.complex and not excel_document.deno_error:
-                document = {'product': excel_document.db_product,
-                            'document_real': excel_document.db_document_real}
-                self.documents[excel_document.db_product.deno] = document
-        SplashScreen().close()
+        rows = self.table[~self.table['complex'] & ~self.table['deno_error']]
+        for db_product, db_document_real in zip(rows['db_product'], rows['db_document_real']):
+            self.documents[db_product.deno] = {'product': db_product,
+                                               'document_real': db_document_real}
         db_documents = DbDocument.addDbDocuments(documents=self.documents)
         # self.delDocumentKTTPDuplicates(valid_documents=db_documents)
 
@@ -348,19 +374,10 @@ class ExcelDataFromTdDb:
     def addDocumentComplex(self) -> None:
         """ Внесение связанных изделий в составном документе """
         complex_documents = {}
-        for num, parent_deno_td in \
-                enumerate(self.complex_documents.keys()):
-            SplashScreen().newMessage(
-                message=f'Подготовка составных технологических процессов ...\n'
-                        f'{parent_deno_td}',
-                upd_bar=False)
-            SplashScreen().changeSubProgressBar(stage=num,
-                                                stages=len(self.complex_documents))
-            sub_products = self.complex_documents[parent_deno_td]
+        for parent_deno_td, sub_products in self.complex_documents.items():
             document_real = self.documents_real[parent_deno_td]['document_real']
             complex_document = {'document_real': document_real,
                                 'sub_products': sub_products}
             complex_documents[document_real] = complex_document
-        SplashScreen().close()
         DbDocumentTdComplex.clearDocumentTdComplex()
         DbDocumentTdComplex.addDbDocumentsTdComplex(documents=complex_documents)
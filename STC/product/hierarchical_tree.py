@@ -1,7 +1,14 @@
 """ Генерация иерархического древа из данных, полученных из БД """
+from __future__ import annotations
+import logging
+from collections.abc import Iterable
+from collections.abc import Iterator
 from dataclasses import dataclass
 from STC.database.database import DbHierarchy
+from STC.database.database import DbHierarchyClosure
+from STC.database.database import HierarchyData
 from STC.database.database import DbDocument
+from STC.functions.func import cell_text
 from STC.functions.func import product_quantity
 from STC.product.product import ProductBuilder
 from STC.product.product import DocumentBuilder
@@ -9,10 +16,10 @@ from STC.product.product import Product
 from STC.product.product import ProductKind
 from STC.product.product import Document
 from STC.product.product import return_document_type
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 
 
-@dataclass
+@dataclass(slots=True)
 class HTreeChild:
     """ Параметры дочернего изделия по отношению к родительскому """
 
@@ -21,7 +28,7 @@ class HTreeChild:
     child_quantity: int | float | None
 
 
-@dataclass
+@dataclass(slots=True)
 class HTreeBranch:
     """ Параметры ветви иерархического древа """
 
@@ -37,6 +44,53 @@ class HTreeBranch:
     child_data: HTreeChild
 
 
+@dataclass(slots=True)
+class HTreeNode:
+    """ Вхождение ветви в развернутое иерархическое древо """
+
+    branch: HTreeBranch
+    level: int
+    index: str
+    position: int  # Позиция вхождения в HierarchicalTree.nodes
+    parent: int  # Позиция родительского вхождения в HierarchicalTree.nodes
+
+
+class HTreeItem:
+    """ Ячейка развернутого иерархического древа с интерфейсом
+        QStandardItem (только чтение) для работы без модели Qt.
+        Позиция -1 - невидимый корень """
+
+    __slots__ = ('tree', 'position', 'column')
+
+    def __init__(self, tree: HierarchicalTree, position: int, column: int = 0) -> None:
+        self.tree = tree
+        self.position = position
+        self.column = column
+
+    def rowCount(self) -> int:
+        """ Количество дочерних строк """
+        if self.column:
+            return 0
+        return len(self.tree.node_children[self.position])
+
+    def child(self, row: int, column: int = 0) -> HTreeItem | None:
+        """ Дочерняя ячейка """
+        try:
+            return HTreeItem(tree=self.tree,
+                             position=self.tree.node_children[self.position][row],
+                             column=column)
+        except IndexError:
+            return None
+
+    def data(self) -> Product:
+        """ Изделие строки """
+        return self.tree.nodes[self.position].branch.product
+
+    def text(self) -> str:
+        """ Текст ячейки основных столбцов древа """
+        return cell_text(self.tree.nodeValues(position=self.position)[self.column])
+
+
 class HierarchicalTree:
     """ Хранит данные иерархического древа для определенного изделия """
 
@@ -44,13 +98,25 @@ class HierarchicalTree:
     kttp_deno_only = {}
     product_kinds = {}
 
-    def __init__(self, product_denotation: str, reverse: bool = False) -> None:
+    def __init__(self, product_denotation: str, reverse: bool = False,
+                 data: HierarchyData | None = None) -> None:
         self.product_builder = ProductBuilder()
         self.document_builder = DocumentBuilder()
         self.product_builder.getDbProductByDenotation(deno=product_denotation)
         self.product = self.product_builder.product
-        self.products = {}
+        self.products = {}  # {изделие: строка матрицы документов}
+        self.document_matrix_types = []  # типы документов - столбцы матрицы документов
+        self.document_matrix = []  # [{строка изделия: [(номер, документ, аннулирован)]}]
         self.document_types = {}  # все типы документов этой иерархии
+        self.children = {}  # {unique_id родителя: [ветви дочерних изделий]}
+        self.nodes = []  # вхождения ветвей (при полной загрузке - в порядке обхода в глубину)
+        self.node_children = {-1: [0]}  # {позиция вхождения: [позиции дочерних вхождений]}
+        self.recursions = []  # ветви, образующие рекурсивную зависимость
+        self.reverse = reverse
+        # id изделий с загруженными связями (None - загружено все древо)
+        self.loaded = None if data is None or data.loaded is None else set(data.loaded)
+        self.with_children = set() if data is None else set(data.with_children)  # id изделий с дочерними
+        self.pending = set()  # позиции вхождений, дочерние вхождения которых не созданы
         self.tree_dicts = [HTreeBranch(unique_id=self.product.id_product,
                                        parent_id=0,
                                        level=0,
@@ -62,11 +128,301 @@ class HierarchicalTree:
                                            child_quantity=None,
                                            child_unit=None)
                                        )]
-        hierarchy = DbHierarchy.getHierarchy(self.product.db_product, reverse)
+        hierarchy = DbHierarchy.getHierarchy(self.product.db_product, reverse, data=data)
         self.treeData(hierarchy=hierarchy,
                       reverse=reverse)
+        self.initNodes()
+        self.initDocumentMatrix()
         self.initClassVars()
 
+    @property
+    def levels(self) -> list[int]:
+        """ Список уровней входимости иерархического древа
+            (при загрузке по уровням - по таблице замыкания иерархии) """
+        if not self.complete:
+            depth = DbHierarchyClosure.getDepth(id_product=self.product.id_product,
+                                                reverse=self.reverse)
+            return list(range(depth + 1))
+        return sorted({node.level for node in self.nodes})
+
+    def initNodes(self) -> None:
+        """ Создание индекса parent - children и списка вхождений
+            ветвей в порядке обхода в глубину с индексами вида 1.2.3.
+            Ветви, образующие рекурсивную зависимость, не разворачиваются """
+        for branch in self.tree_dicts[1:]:
+            self.children.setdefault(branch.parent_id, []).append(branch)
+        root_branch = self.tree_dicts[0]
+        self.nodes = [HTreeNode(branch=root_branch, level=0, index='', position=0, parent=-1)]
+        self.node_children = {-1: [0], 0: []}
+        self.pending = set()
+        self.addNodes(position=0)
+
+    def addNodes(self, position: int, depth: int | None = None) -> list[int]:
+        """ Создание дочерних вхождений для вхождения position в порядке обхода
+            в глубину до уровня depth (None - на всю глубину загруженных связей).
+            Вхождения изделий, дочерние вхождения которых не созданы,
+            добавляются в pending. О ветвях, образующих рекурсивную
+            зависимость, выводится предупреждение.
+            Возвращает позиции созданных вхождений """
+        first = len(self.nodes)
+        first_recursion = len(self.recursions)
+        path = set()
+        ancestor = position
+        while ancestor >= 0:
+            path.add(self.nodes[ancestor].branch.unique_id)
+            ancestor = self.nodes[ancestor].parent
+        children_count = {position: len(self.node_children[position])}
+        stack = [(position, iter(self.children.get(self.nodes[position].branch.unique_id, [])))]
+        while stack:
+            position, children = stack[-1]
+            branch = next(children, None)
+            if branch is None:
+                stack.pop()
+                path.discard(self.nodes[position].branch.unique_id)
+                continue
+            if branch.unique_id in path:
+                logging.warning(f'Обнаружена рекурсивная зависимость в {branch.name} {branch.deno}')
+                self.recursions.append(branch)
+                continue
+            parent = self.nodes[position]
+            children_count[position] += 1
+            self.nodes.append(HTreeNode(branch=branch,
+                                        level=parent.level + 1,
+                                        index=f'{parent.index}{children_count[position]}.',
+                                        position=len(self.nodes),
+                                        parent=position))
+            children_count[len(self.nodes) - 1] = 0
+            self.node_children[position].append(len(self.nodes) - 1)
+            self.node_children[len(self.nodes) - 1] = []
+            if not self.isLoaded(branch.unique_id) or depth is not None and parent.level + 1 >= depth:
+                if self.hasChildren(branch.unique_id):
+                    self.pending.add(len(self.nodes) - 1)
+                continue
+            path.add(branch.unique_id)
+            stack.append((len(self.nodes) - 1, iter(self.children.get(branch.unique_id, []))))
+        if len(self.recursions) > first_recursion:
+            PROGRESS.close()
+            PROGRESS.showDialog('\n'.join(f'Обнаружена рекурсивная зависимость в {branch.name} {branch.deno}'
+                                          for branch in self.recursions[first_recursion:]), 'warning')
+        return list(range(first, len(self.nodes)))
+
+    @property
+    def complete(self) -> bool:
+        """ Загружены ли связи всех изделий древа """
+        return self.loaded is None
+
+    def isLoaded(self, unique_id: int) -> bool:
+        """ Загружены ли связи изделия с дочерними """
+        return self.loaded is None or unique_id in self.loaded
+
+    def hasChildren(self, unique_id: int) -> bool:
+        """ Есть ли у изделия дочерние (в т.ч. не загруженные) """
+        if self.isLoaded(unique_id):
+            return bool(self.children.get(unique_id))
+        return unique_id in self.with_children
+
+    def lowerId(self, db_hierarchy: DbHierarchy) -> int:
+        """ id дочернего изделия связи (родительского при reverse) """
+        return db_hierarchy.id_parent if self.reverse else db_hierarchy.id_child
+
+    def fetchMore(self, position: int) -> list[int]:
+        """ Создание дочерних вхождений для вхождения position. Не загруженные
+            связи загружаются сразу для всех изделий того же уровня из pending
+            (по одному запросу id_parent IN (...) на уровень).
+            Возвращает позиции созданных вхождений """
+        node = self.nodes[position]
+        if not self.isLoaded(node.branch.unique_id):
+            ids_product = sorted({self.nodes[pending].branch.unique_id for pending in self.pending
+                                  if self.nodes[pending].level == node.level
+                                  and not self.isLoaded(self.nodes[pending].branch.unique_id)})
+            self.loadChildren(ids_product=ids_product, level=node.level + 1)
+        self.pending.discard(position)
+        positions = self.addNodes(position=position, depth=node.level + 1)
+        self.addDocumentMatrixRows(positions=positions)
+        return positions
+
+    def fetchToLevel(self, level: int) -> list[int]:
+        """ Создание вхождений до уровня level включительно
+            (раскрытие древа до уровня). Возвращает позиции созданных вхождений """
+        positions = []
+        while True:
+            pending = sorted(position for position in self.pending
+                             if self.nodes[position].level < level)
+            if not pending:
+                return positions
+            for position in pending:
+                positions.extend(self.fetchMore(position=position))
+
+    def fetchAll(self) -> list[int]:
+        """ Загрузка всех не загруженных связей древа одним запросом
+            (для выгрузки, поиска и других операций над всем древом)
+            и создание всех вхождений. Возвращает позиции созданных вхождений """
+        if self.complete:
+            return []
+        hierarchy = DbHierarchy.getHierarchy(self.product.db_product, self.reverse)
+        for hierarchy_dict in hierarchy[1:]:
+            db_hierarchy = hierarchy_dict['db_hierarchy']
+            id_upper = db_hierarchy.id_child if self.reverse else db_hierarchy.id_parent
+            if id_upper not in self.loaded:
+                self.addBranch(level=hierarchy_dict['level'],
+                               db_hierarchy=db_hierarchy,
+                               db_documents=hierarchy_dict['db_documents'])
+        self.loaded = None
+        positions = []
+        pending, self.pending = sorted(self.pending), set()
+        for position in pending:
+            positions.extend(self.addNodes(position=position))
+        self.addDocumentMatrixRows(positions=positions)
+        return positions
+
+    def loadChildren(self, ids_product: list[int], level: int) -> None:
+        """ Загрузка связей изделий ids_product с дочерними
+            и документов дочерних изделий """
+        data = HierarchyData(id_product=self.product.id_product,
+                             reverse=self.reverse,
+                             loaded=self.loaded,
+                             with_children=self.with_children)
+        DbHierarchy.getChildren(ids_product=ids_product, data=data)
+        db_documents = DbHierarchy.groupDbDocuments(data.db_documents)
+        for db_hierarchy in data.db_hierarchies:
+            self.addBranch(level=level,
+                           db_hierarchy=db_hierarchy,
+                           db_documents=db_documents.get(self.lowerId(db_hierarchy), []))
+
+    def addBranch(self, level: int, db_hierarchy: DbHierarchy, db_documents: list[DbDocument]) -> None:
+        """ Добавление ветви догруженной связи в индекс parent - children """
+        branch = self.treeSubData(level=level,
+                                  unique_id=db_hierarchy.id_child,
+                                  parent_id=db_hierarchy.id_parent,
+                                  reverse=self.reverse,
+                                  db_hierarchy=db_hierarchy,
+                                  db_documents=db_documents)
+        self.tree_dicts.append(branch)
+        self.children.setdefault(branch.parent_id, []).append(branch)
+
+    def nodeValues(self, position: int) -> tuple:
+        """ Значения основных столбцов для вхождения древа:
+            индекс, уровень, наименование, обозначение,
+            тип, количество, единица измерения """
+        node = self.nodes[position]
+        branch = node.branch
+        return (node.index or None,
+                node.level,
+                branch.name,
+                branch.deno,
+                branch.child_data.child_type,
+                branch.child_data.child_quantity,
+                branch.child_data.child_unit)
+
+    def invisibleRootItem(self) -> HTreeItem:
+        """ Невидимый корень древа с интерфейсом QStandardItem """
+        return HTreeItem(tree=self, position=-1)
+
+    def initDocumentMatrix(self) -> None:
+        """ Создание разреженной матрицы изделия × типы документов.
+            Для каждого изделия и типа документа хранятся документы
+            в порядке перебора Product.documents и признак аннулирования """
+        self.products = {}
+        self.document_matrix_types = []
+        self.document_matrix = []
+        self.addDocumentMatrixRows(positions=range(len(self.nodes)))
+
+    def addDocumentMatrixRows(self, positions: Iterable[int]) -> None:
+        """ Добавляет в матрицу документов строки
+            изделий вхождений positions """
+        for position in positions:
+            product = self.nodes[position].branch.product
+            if product not in self.products:
+                self.products[product] = len(self.products)
+                self.addDocumentMatrixRow(product=product)
+
+    def addDocumentMatrixRow(self, product: Product) -> None:
+        """ Заполняет строку матрицы документов для изделия """
+        row = self.products[product]
+        columns = {id(document_type): column
+                   for column, document_type in enumerate(self.document_matrix_types)}
+        for number, document in enumerate(product.documents):
+            document_type = document.document_type
+            column = columns.get(id(document_type))
+            if column is None:
+                column = len(self.document_matrix_types)
+                columns[id(document_type)] = column
+                self.document_matrix_types.append(document_type)
+                self.document_matrix.append({})
+            annulled = document.db_document.document_real.stage.stage == 'Аннулирован'
+            self.document_matrix[column].setdefault(row, []).append((number, document, annulled))
+
+    def updDocumentMatrix(self, product: Product) -> None:
+        """ Обновляет строку матрицы документов
+            после изменения документов изделия """
+        row = self.products.get(product)
+        if row is None:
+            return
+        for cells in self.document_matrix:
+            cells.pop(row, None)
+        self.addDocumentMatrixRow(product=product)
+
+    def documentColumn(self, data: dict[str, str | bool | None]) -> list:
+        """ Значения столбца документов определенного типа для всех изделий
+            древа (по строкам матрицы документов). Результат совпадает
+            с Product.getData для каждого изделия """
+        only_relevant = data.get('only_relevant') is not None
+        first = data.get('first') is not None
+        only_text = data.get('only_text', True)
+        setting = data.get('setting')
+        document_type = return_document_type(
+            class_name=data.get('class_name'),
+            subtype_name=data.get('subtype_name'),
+            organization_code=data.get('organization_code'),
+            method_code=data.get('method_code'))
+        if only_text:
+            values = [''] * len(self.products)
+        elif first:
+            values = [None] * len(self.products)
+        else:
+            values = [[] for _ in range(len(self.products))]
+        if document_type is None:
+            return values
+        columns = [self.document_matrix[column]
+                   for column, matrix_type in enumerate(self.document_matrix_types)
+                   if matrix_type == document_type]
+        rows = {}
+        for cells in columns:
+            for row, documents in cells.items():
+                rows.setdefault(row, []).extend(documents)
+        for row, documents in rows.items():
+            if len(columns) > 1:
+                documents.sort(key=lambda item: item[0])
+            result = []
+            for _, document, annulled in documents:
+                if not (only_relevant and annulled):
+                    if setting:
+                        result.append(document.getAttrValueByName(attr_name=setting,
+                                                                  only_text=only_text))
+                    else:
+                        result.append(document)
+            if only_text:
+                if first:
+                    values[row] = '' if not result else result[0]
+                else:
+                    values[row] = '' if not result else chr(10).join(result)
+            elif first:
+                values[row] = None if not result else result[0]
+            else:
+                values[row] = result
+        return values
+
+    def walk(self, position: int = 0) -> Iterator[HTreeNode]:
+        """ Обход вхождений поддерева начиная с заданного в глубину
+            (для полностью загруженного древа) """
+        level = self.nodes[position].level
+        yield self.nodes[position]
+        for next_position in range(position + 1, len(self.nodes)):
+            node = self.nodes[next_position]
+            if node.level <= level:
+                break
+            yield node
+
     def addDocuments(self, db_documents: list[DbDocument],
                      product: Product) -> None:
         """ Инициализация экземпляров Document, отражающих
@@ -83,12 +439,12 @@ class HierarchicalTree:
     def treeData(self, hierarchy: list[dict], reverse: bool) -> None:
         """ Создание списка словарей, хранящего данные древа иерархии. """
         amount = len(hierarchy)
-        SplashScreen().newMessage(message='Генерация иерархии...',
-                                  log=True,
-                                  logging_level='DEBUG')
+        PROGRESS.newMessage(message='Генерация иерархии...',
+                            log=True,
+                            logging_level='DEBUG')
         for count, hierarchy_dict in enumerate(hierarchy):
-            SplashScreen().changeSubProgressBar(stage=count,
-                                                stages=amount)
+            PROGRESS.changeSubProgressBar(stage=count,
+                                          stages=amount)
             if hierarchy_dict['root']:
                 self.addDocuments(db_documents=hierarchy_dict['db_documents'],
                                   product=self.product)
@@ -101,7 +457,7 @@ class HierarchicalTree:
                                             reverse=reverse)
                 self.tree_dicts.append(sub_data)
         self.tree_dicts.sort()
-        SplashScreen().changeSubProgressBar(stage=0, stages=0)
+        PROGRESS.changeSubProgressBar(stage=0, stages=0)
 
     # pylint: disable=too-many-arguments
     def treeSubData(self, level: int,
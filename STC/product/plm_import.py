@@ -1,9 +1,10 @@
 """ Вносит в БД данные из xlm выгрузок PLM системы """
 
+from STC.database.database import DbConnection
 from STC.database.database import DbDocument
 from STC.database.database import DbDocumentReal
 from STC.database.database import DbProduct
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 from STC.plm.plm import DataFromPLM
 from STC.product.product import DocumentType
 from STC.product.product import return_document_type
@@ -13,16 +14,37 @@ class PLMSync:
     """ Обновляет и вносит новые данные в БД
         из xlm выгрузок из PLM"""
 
-    def __init__(self) -> None:
-        self.plm_data = DataFromPLM()
-        self.plm_products = self.plm_data.products
+    def __init__(self, full: bool = False) -> None:
+        """ full -> считать все выгрузки заново, а не только
+            новые и измененные с прошлой синхронизации """
+
+        with PROGRESS.stageTimer(message='Считывание выгрузок PLM...'):
+            self.plm_data = DataFromPLM(full=full)
+            self.plm_products = self.plm_data.products
         # self.plm_stages = self.plm_data.doc_stages
-        DbProduct.updData()
-        DbDocument.updData()
-        DbDocumentReal.updData()
-        SplashScreen().closeWithWindow()
-        self.addProduct()
-        self.addDocument()
+        try:
+            if self.plm_products:
+                self.updDb()
+            else:
+                PROGRESS.closeWithWindow()
+            if DbConnection.dry_run_transaction is None:
+                self.plm_data.saveCache()
+        finally:
+            self.plm_data.cache.close()
+
+    def updDb(self) -> None:
+        """ Внесение в БД изделий и документов,
+            затронутых считанными выгрузками """
+
+        with PROGRESS.stageTimer(message='Загрузка данных из БД...'):
+            DbProduct.updData()
+            DbDocument.updData()
+            DbDocumentReal.updData()
+        PROGRESS.closeWithWindow()
+        with PROGRESS.stageTimer(message='Внесение изделий...'):
+            self.addProduct()
+        with PROGRESS.stageTimer(message='Внесение документов...'):
+            self.addDocument()
 
     def addProduct(self) -> None:
         """ Внесение в БД данных об изделиях """
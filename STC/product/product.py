@@ -5,6 +5,7 @@
 from __future__ import annotations
 import logging
 import re
+from collections.abc import MutableSet
 from datetime import datetime
 from PyQt5.QtGui import QFont
 from PyQt5.QtGui import QFontMetrics
@@ -52,7 +53,7 @@ from STC.database.database import DbWorkplace
 from STC.functions.func import add_missing_keys
 from STC.functions.func import date_format
 from STC.functions.func import sort_un
-from STC.gui.splash_screen import SplashScreen
+from STC.progress.progress import PROGRESS
 
 
 def upd_data_from_db() -> None:
@@ -68,7 +69,40 @@ def return_document_type(class_name: str = None,
                          sign: str = None,
                          deno: str = None,
                          db_document_type: DbDocumentType = None) -> DocumentType | None:
-    """ Возвращает тип документа """
+    """ Возвращает тип документа.
+        Результат кэшируется по набору аргументов
+        до изменения справочника типов документов и
+        возвращается всем вызывающим одним экземпляром,
+        поэтому изменять его нельзя. Неопределенный
+        тип (None) не кэшируется """
+
+    # pylint: disable=too-many-arguments
+
+    DocumentTypeBuilder.checkCatalogVersion()
+    key = (class_name, subtype_name, method_code, organization_code,
+           sign, deno, db_document_type)
+    if key in DocumentTypeBuilder.resolved:
+        return DocumentTypeBuilder.resolved[key]
+    document_type = resolve_document_type(class_name=class_name,
+                                          subtype_name=subtype_name,
+                                          method_code=method_code,
+                                          organization_code=organization_code,
+                                          sign=sign,
+                                          deno=deno,
+                                          db_document_type=db_document_type)
+    if document_type is not None:
+        DocumentTypeBuilder.resolved[key] = document_type
+    return document_type
+
+
+def resolve_document_type(class_name: str = None,
+                          subtype_name: str = None,
+                          method_code: str = None,
+                          organization_code: str = None,
+                          sign: str = None,
+                          deno: str = None,
+                          db_document_type: DbDocumentType = None) -> DocumentType | None:
+    """ Определяет тип документа без использования кэша """
 
     # pylint: disable=too-many-arguments
 
@@ -104,9 +138,11 @@ def return_document_type(class_name: str = None,
 class Connection:
     """ Управление подключением к БД """
 
-    def __init__(self) -> None:
+    def __init__(self, read_only: bool = False, dry_run: bool = False) -> None:
         self.path = CFG_DB.main.folder
         self.name = CFG_DB.main.file_name
+        self.read_only = read_only
+        self.dry_run = dry_run
         self.connect()
         DbConnection.updAllData()
 
@@ -118,20 +154,24 @@ class Connection:
 
     def update(self) -> None:
         """ Обновление подключения к БД.
-            Загрузка актуальных данных """
+            Догрузка добавленных и измененных данных """
 
         self.resetBuilders()
         self.close()
-        DbConnection.initSession(self.path, self.name)
-        DbConnection.updAllData()
+        DbConnection.initSession(self.path, self.name,
+                                 read_only=self.read_only,
+                                 dry_run=self.dry_run)
+        DbConnection.updAllData(incremental=True)
 
     def connect(self) -> None:
         """ Подключение к БД """
 
-        SplashScreen().newMessage(message=rf'Подключение к базе данных {self.path}\{self.name}',
-                                  log=True,
-                                  logging_level='INFO')
-        DbConnection.initSession(self.path, self.name)
+        PROGRESS.newMessage(message=rf'Подключение к базе данных {self.path}\{self.name}',
+                            log=True,
+                            logging_level='INFO')
+        DbConnection.initSession(self.path, self.name,
+                                 read_only=self.read_only,
+                                 dry_run=self.dry_run)
 
     @staticmethod
     def resetBuilders() -> None:
@@ -446,6 +486,9 @@ class DocumentTypeBuilder:
         3) Экземпляр DbDocumentType """
 
     document_types = {}
+    resolved = {}  # {аргументы return_document_type: DocumentType}
+    deno_types = {}  # {децимальный номер: (DbDocumentType, код организации, код метода)}
+    catalog_version = None
     _exceptions = {'Структурная схема изделия': 'Схема деления структурная',
                    'Таблица соединений': 'Таблица',
                    'Схема электро кинематическая расположения': 'Схема комбинированная расположения',
@@ -483,6 +526,26 @@ class DocumentTypeBuilder:
         self.reset()
         return document_type
 
+    @classmethod
+    def checkCatalogVersion(cls) -> None:
+        """ Сбрасывает кэши определения типов документов
+            при изменении справочника типов документов """
+
+        if cls.catalog_version != DbDocumentType.catalog_version:
+            cls.resolved = {}
+            cls.deno_types = {}
+            cls.catalog_version = DbDocumentType.catalog_version
+
+    def initDenoTypes(self) -> None:
+        """ Заполняет словарь типов документов
+            по децимальным номерам всех документов из БД """
+
+        DbDocumentType.updCheck()
+        self.checkCatalogVersion()
+        for deno in DbDocumentReal.getAllDeno():
+            if deno and deno not in self.__class__.deno_types:
+                self.__class__.deno_types[deno] = self.parseDeno(deno)
+
     def ifExists(self, db_document_type: DbDocumentType,
                  method_code: str,
                  organization_code: str) -> None:
@@ -511,6 +574,7 @@ class DocumentTypeBuilder:
 
         # pylint: disable=too-many-arguments
 
+        DbDocumentType.updCheck()
         if deno:
             db_document_type, organization_code, method_code = self.typeByDeno(deno)
         if db_document_type is None:
@@ -551,7 +615,17 @@ class DocumentTypeBuilder:
         self._document_type._db_document_type = db_document_type
 
     def typeByDeno(self, deno: str) -> tuple[DbDocumentType | None, str | None, str | None]:
-        """ Определение типа документа по децимальному номеру """
+        """ Определение типа документа по децимальному номеру.
+            При первом обращении разбираются номера всех документов из БД """
+
+        if not self.__class__.deno_types:
+            self.initDenoTypes()
+        if deno not in self.__class__.deno_types:
+            self.__class__.deno_types[deno] = self.parseDeno(deno)
+        return self.__class__.deno_types[deno]
+
+    def parseDeno(self, deno: str) -> tuple[DbDocumentType | None, str | None, str | None]:
+        """ Разбор децимального номера документа """
 
         deno = deno.replace(' ', '')
         if re.fullmatch('Всоставе' + r'\w{4}.\d{5}.\d{5}', deno):
@@ -1048,6 +1122,62 @@ class ProfessionBuilder:
             logging.warning(msg)
 
 
+class DocumentSet(MutableSet):
+    """ Множество документов изделия с индексом по виду документа
+        (DbDocumentType: класс и наименование вида документа).
+        Документы перебираются в порядке добавления """
+
+    def __init__(self, documents=()) -> None:
+        self._documents = {}
+        self._index = {}
+        for document in documents:
+            self.add(document)
+
+    def __contains__(self, document) -> bool:
+        return document in self._documents
+
+    def __iter__(self):
+        return iter(self._documents)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, document: Document) -> None:
+        """ Добавляет документ в множество и индекс """
+
+        if document not in self._documents:
+            self._documents[document] = None
+            key = document.document_type.document_type
+            self._index.setdefault(key, []).append(document)
+
+    def discard(self, document: Document) -> None:
+        """ Удаляет документ из множества и индекса """
+
+        if document in self._documents:
+            del self._documents[document]
+            key = document.document_type.document_type
+            self._index[key].remove(document)
+            if not self._index[key]:
+                del self._index[key]
+
+    def byType(self, document_type: DocumentType) -> list[Document]:
+        """ Документы определенного типа с учетом кода
+            организации и метода изготовления """
+
+        candidates = self._index.get(document_type.document_type, [])
+        return [document for document in candidates
+                if document.document_type == document_type]
+
+    def bySubtypeName(self, subtype_names: tuple[str, ...]) -> list[Document]:
+        """ Документы с определенными наименованиями вида документа """
+
+        result = []
+        for db_document_type, documents in self._index.items():
+            if db_document_type.subtype_name in subtype_names:
+                result.extend(documents)
+        return result
+
+
 class Product:
     """ Содержит данные об изделии и оформленных к нему документов """
 
@@ -1056,7 +1186,20 @@ class Product:
     def __init__(self) -> None:
         self.db_product = None
         self.projects = None
-        self.documents = set()
+        self._documents = DocumentSet()
+
+    @property
+    def documents(self) -> DocumentSet:
+        """ Документы изделия """
+
+        return self._documents
+
+    @documents.setter
+    def documents(self, documents) -> None:
+        """ Заменяет документы изделия с перестроением индекса """
+
+        self._documents = documents if isinstance(documents, DocumentSet) \
+            else DocumentSet(documents)
 
     def getData(self, data: dict[str, str | None]):
         """ Возвращает как значения аттрибутов изделия, так и
@@ -1106,15 +1249,15 @@ class Product:
             subtype_name=subtype_name,
             organization_code=org_code,
             method_code=meth_code)
-        for document in self.documents:
-            if document.document_type == document_type:
-                outdated = document.db_document.document_real.stage.stage == 'Аннулирован'
-                if not (only_relevant and outdated):
-                    if setting:
-                        result.append(document.getAttrValueByName(attr_name=setting,
-                                                                  only_text=only_text))
-                    else:
-                        result.append(document)
+        documents = self.documents.byType(document_type) if document_type is not None else []
+        for document in documents:
+            outdated = document.db_document.document_real.stage.stage == 'Аннулирован'
+            if not (only_relevant and outdated):
+                if setting:
+                    result.append(document.getAttrValueByName(attr_name=setting,
+                                                              only_text=only_text))
+                else:
+                    result.append(document)
         if only_text:
             if first:
                 return '' if not result else result[0]
@@ -1193,7 +1336,7 @@ class Product:
         """ Обновить список документов изделия,
             подгрузив данные из БД """
 
-        self.documents = set()
+        self.documents = DocumentSet()
         builder = DocumentBuilder()
         documents = self.db_product.getDbDocuments()
         for db_document in documents:
@@ -1394,12 +1537,9 @@ class Product:
 
         upd_date = self.db_product.date_check
         plm_date = None
-        for document in self.documents:
-            type_name = document.db_document.document_real.document_type.subtype_name
-            names = ['Спецификация', 'Чертеж детали']
-            if type_name in names:
-                plm_date = document.db_document.document_real.date_changed
-                break
+        for document in self.documents.bySubtypeName(('Спецификация', 'Чертеж детали')):
+            plm_date = document.db_document.document_real.date_changed
+            break
         if plm_date and upd_date:
             if plm_date > upd_date:
                 status = 'Устарело'
@@ -1419,10 +1559,9 @@ class Product:
 
         upd_date = self.db_product.date_check
         plm_date = None
-        for document in self.documents:
-            if document.db_document.document_real.document_type.subtype_name == 'Спецификация':
-                plm_date = document.db_document.document_real.date_changed
-                break
+        for document in self.documents.bySubtypeName(('Спецификация',)):
+            plm_date = document.db_document.document_real.date_changed
+            break
         if plm_date and upd_date:
             if plm_date > upd_date:
                 time = plm_date - upd_date
@@ -1484,24 +1623,25 @@ class Product:
 
         if self.db_product.kind:
             return ProductKind(self.db_product.kind)
+        DbProductKind.updCheck()
         return ProductKind(DbProductKind.data[self.product_type.type_name])
 
     @product_kind.setter
     def product_kind(self, kind: ProductKind) -> None:
         """ Изменить вид изделия """
 
-        SplashScreen().newMessage(message='Изменение вида изделия',
-                                  stage=0,
-                                  stages=8,
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Изменение вида изделия',
+                            stage=0,
+                            stages=8,
+                            log=True,
+                            logging_level='INFO')
         DbProduct.addDbProduct(deno=self.deno,
                                name=self.name,
                                id_kind=kind.id_kind)
-        SplashScreen().newMessage(message='Вид изделия изменен',
-                                  log=True,
-                                  logging_level='INFO')
-        SplashScreen().closeWithWindow()
+        PROGRESS.newMessage(message='Вид изделия изменен',
+                            log=True,
+                            logging_level='INFO')
+        PROGRESS.closeWithWindow()
 
     @property
     def product_kind_name(self) -> str:
@@ -1544,6 +1684,7 @@ class ProductType:
     def getAllTypes() -> list[DbProductType]:
         """ Возвращает список типов изделий """
 
+        DbProductType.updCheck()
         return list(set(list(DbProductType.data.values())))
 
     @property
@@ -1582,6 +1723,7 @@ class ProductKind:
         else:
             self._db_product_kind = DbProductKind.getData(product_kind)
             if self._db_product_kind is None:
+                DbProductKind.updCheck()
                 self._db_product_kind = DbProductKind.data[0]
 
     @classmethod
@@ -1589,6 +1731,7 @@ class ProductKind:
         """ Словарь из всех видов изделий в БД
             {Наименование вида: экземпляр DbProductKind}"""
 
+        DbProductKind.updCheck()
         kind_dict = {}
         for kind in DbProductKind.data.values():
             kind_dict[kind.name_short] = kind
@@ -1719,17 +1862,17 @@ class Document:
         """ Сохранить данные маршрутной карты в БД """
 
         DbOperationDoc.delOutdatedOperations(operations=self.operations)
-        SplashScreen().newMessage(message='Cохранение документа...',
-                                  stage=0,
-                                  stages=len(self.operations) + 2,
-                                  log=True,
-                                  logging_level='INFO')
+        PROGRESS.newMessage(message='Cохранение документа...',
+                            stage=0,
+                            stages=len(self.operations) + 2,
+                            log=True,
+                            logging_level='INFO')
 
         for operation in self.operations.values():
             msg = f'Сохранение операции {operation.num} {operation.name}'
-            SplashScreen().newMessage(message=msg,
-                                      log=True,
-                                      logging_level='INFO')
+            PROGRESS.newMessage(message=msg,
+                                log=True,
+                                logging_level='INFO')
             DbOperationDoc.addOperation(operation=operation)
             DbSentenceDoc.delSentences(sentences=operation.sentences_for_del)
             operation.sentences_for_del = []
@@ -1741,11 +1884,11 @@ class Document:
             DbMaterialDoc.updMats(sentences=operation.sentences)
         self.changeStageOfMk()
         logging.info('Документ сохранен')
-        SplashScreen().newMessage(message='Документ сохранен',
-                                  log=True,
-                                  logging_level='INFO')
-        SplashScreen().closeWithWindow(msg=f'Документ {self.name} {self.deno} сохранен',
-                                       m_type='info')
+        PROGRESS.newMessage(message='Документ сохранен',
+                            log=True,
+                            logging_level='INFO')
+        PROGRESS.closeWithWindow(msg=f'Документ {self.name} {self.deno} сохранен',
+                                 m_type='info')
 
     def generateCommonProperties(self) -> list[str]:
         # TODO Вынести метод в класс технологических документов
@@ -2168,6 +2311,7 @@ class DocumentType:
         """ Возвращает список типов документа для
             определенного класса документов (КД/ТД) """
 
+        DbDocumentType.updCheck()
         result = []
         for db_document_type in DbDocumentType.data.values():
             builder = DocumentTypeBuilder()
@@ -2297,6 +2441,7 @@ class DocumentStage:
     """ Этап разработки документа """
 
     def __init__(self, stage: str) -> None:
+        DbDocumentStage.updCheck()
         db_stages = DbDocumentStage.data
         try:
             self.db_stage = db_stages[str(stage).lower()]
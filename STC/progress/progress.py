@@ -0,0 +1,250 @@
+""" Отчет о ходе выполнения операций слоем данных без зависимости от Qt.
+
+    Слой данных вызывает методы PROGRESS, а вывод выполняет подключенный
+    приемник: SplashScreenSink в приложении, LoggingSink или NullSink
+    при работе без интерфейса. Обновления прогресс бара в циклах
+    ограничиваются по частоте (max_rate раз в секунду) """
+
+from __future__ import annotations
+import logging
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import monotonic
+from time import perf_counter
+
+
+def add_to_log(message: str, logging_level: str) -> None:
+    """ Дублирование сообщения в лог в зависимости от уровня логирования """
+
+    level = logging.getLevelName(logging_level)
+    if isinstance(level, int) and level > logging.NOTSET:
+        logging.log(level, message)
+
+
+@dataclass
+class StageTiming:
+    """ Время выполнения этапа операции """
+
+    stage: str
+    seconds: float
+
+
+class NullSink:
+    """ Приемник, не выводящий ход выполнения """
+
+    # pylint: disable=unused-argument
+
+    def newMessage(self, message: str,
+                   stage: int | None = None,
+                   stages: int | None = None,
+                   upd_bar: bool = True,
+                   hide_pb: bool = False) -> None:
+        """ Текст сообщения и состояние основного прогресс бара """
+
+    def changeSubProgressBar(self, stage: int | None = None, stages: int | None = None) -> None:
+        """ Состояние дополнительного прогресс бара """
+
+    def showDialog(self, text: str, m_type: str | None = None) -> None:
+        """ Сообщение, требующее внимания пользователя """
+
+    def closeWithWindow(self, window=None, msg: str | None = None, m_type: str = 'info') -> None:
+        """ Завершение вывода хода выполнения """
+
+    def close(self) -> None:
+        """ Скрытие вывода хода выполнения """
+
+
+class LoggingSink(NullSink):
+    """ Приемник, выводящий ход выполнения в лог
+        (для запуска без интерфейса) """
+
+    def __init__(self, level: int = logging.DEBUG) -> None:
+        self.level = level
+
+    def newMessage(self, message: str,
+                   stage: int | None = None,
+                   stages: int | None = None,
+                   upd_bar: bool = True,
+                   hide_pb: bool = False) -> None:
+        """ Текст сообщения и состояние основного прогресс бара """
+
+        logging.log(self.level, message.replace('\n', ' '))
+
+    def changeSubProgressBar(self, stage: int | None = None, stages: int | None = None) -> None:
+        """ Состояние дополнительного прогресс бара """
+
+        if stage is not None and stages:
+            logging.log(self.level, f'{stage}/{stages}')
+
+    def showDialog(self, text: str, m_type: str | None = None) -> None:
+        """ Сообщение, требующее внимания пользователя """
+
+        match m_type:
+            case 'critical' | 'Critical':
+                logging.error(text)
+            case 'info':
+                logging.info(text)
+            case _:
+                logging.warning(text)
+
+    def closeWithWindow(self, window=None, msg: str | None = None, m_type: str = 'info') -> None:
+        """ Завершение вывода хода выполнения """
+
+        if msg is not None:
+            self.showDialog(text=msg, m_type=m_type)
+
+
+class ProgressReporter:
+    """ Отчет о ходе выполнения с ограничением частоты
+        обновления прогресс бара """
+
+    def __init__(self, sink: NullSink | None = None, max_rate: float = 20) -> None:
+        self.sink = sink if sink is not None else LoggingSink()
+        self.interval = 1 / max_rate
+        self.stage = 0
+        self.timings = []  # [StageTiming] этапов, выполненных через stage()
+        self._stages = None
+        self._last_update = 0.0
+
+    def setSink(self, sink: NullSink) -> None:
+        """ Подключение приемника хода выполнения """
+
+        self.sink = sink
+
+    def isThrottled(self, stage: int | None, stages: int | None) -> bool:
+        """ Пропустить ли обновление прогресс бара в цикле.
+            Начало, конец и смена количества этапов выводятся всегда """
+
+        now = monotonic()
+        boundary = stage is None or stages is None or stage <= 0 \
+            or stage >= stages - 1 or stages != self._stages
+        self._stages = stages
+        if not boundary and now - self._last_update < self.interval:
+            return True
+        self._last_update = now
+        return False
+
+    def newMessage(self, message: str,
+                   stage: int | None = None,
+                   stages: int | None = None,
+                   log: bool = False,
+                   upd_bar: bool = True,
+                   logging_level: str = 'NOTSET',
+                   hide_pb: bool = False) -> None:
+        """ Текст сообщения, запись в лог
+            и изменение основного прогресс бара """
+
+        # pylint: disable=too-many-arguments
+
+        if log:
+            add_to_log(message.replace('\n', ' '), logging_level)
+        if upd_bar:
+            self.stage = stage if isinstance(stage, int) else self.stage + 1
+        self._last_update = monotonic()
+        self.sink.newMessage(message=message,
+                             stage=stage,
+                             stages=stages,
+                             upd_bar=upd_bar,
+                             hide_pb=hide_pb)
+
+    @contextmanager
+    def stageTimer(self, message: str,
+                   stage: int | None = None,
+                   stages: int | None = None) -> Iterator[None]:
+        """ Этап операции: сообщение о начале этапа
+            и замер времени его выполнения в timings """
+
+        self.newMessage(message=message, stage=stage, stages=stages)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append(StageTiming(stage=message.replace('\n', ' ').rstrip('. '),
+                                            seconds=perf_counter() - start))
+
+    def changeSubProgressBar(self, stage: int | None = None, stages: int | None = None) -> None:
+        """ Изменение дополнительного прогресс бара
+            (не чаще max_rate раз в секунду) """
+
+        if not self.isThrottled(stage=stage, stages=stages):
+            self.sink.changeSubProgressBar(stage=stage, stages=stages)
+
+    def step(self, message: str, stage: int, stages: int) -> None:
+        """ Текст сообщения и дополнительный прогресс бар
+            для шага цикла (не чаще max_rate раз в секунду) """
+
+        if not self.isThrottled(stage=stage, stages=stages):
+            self.sink.newMessage(message=message, upd_bar=False)
+            self.sink.changeSubProgressBar(stage=stage, stages=stages)
+
+    def writeToDB(self) -> None:
+        """ Сообщение о записи данных в БД """
+
+        self.newMessage(message='Запись информации в базу данных...',
+                        hide_pb=True,
+                        upd_bar=False)
+
+    def basicReceive(self, title: str, upd_bar: bool = True) -> None:
+        """ Стандартное сообщение для 3-х этапного получения данных:
+            1. Ожидание ответа ...
+            2. Обработка данных...
+            3. Обработка данных завершена"""
+
+        self.newMessage(message=f'{title}\nОжидание ответа ...',
+                        log=True,
+                        stage=1,
+                        stages=3,
+                        upd_bar=upd_bar,
+                        logging_level='INFO')
+
+    def basicProceed(self, title: str, upd_bar: bool = True) -> None:
+        """ Стандартное сообщение для 3-х этапного получения данных:
+            1. Ожидание ответа ...
+            2. Обработка данных...
+            3. Обработка данных завершена"""
+
+        self.newMessage(message=f'{title}\nОбработка данных...',
+                        log=True,
+                        upd_bar=upd_bar,
+                        logging_level='DEBUG')
+
+    def basicCompletion(self, title: str, upd_bar: bool = True) -> None:
+        """ Стандартное сообщение для 3-х этапного получения данных:
+            1. Ожидание ответа ...
+            2. Обработка данных...
+            3. Обработка данных завершена"""
+
+        self.newMessage(message=f'{title}\nОбработка данных завершена',
+                        log=True,
+                        stage=0,
+                        stages=0,
+                        upd_bar=upd_bar,
+                        logging_level='DEBUG')
+        self.changeSubProgressBar(stage=0, stages=0)
+        self.close()
+
+    def basicMsg(self, title: str) -> None:
+        """ Шаблон простого сообщения """
+
+        self.newMessage(message=f'{title} ...',
+                        hide_pb=True)
+
+    def showDialog(self, text: str, m_type: str | None = None) -> None:
+        """ Сообщение, требующее внимания пользователя """
+
+        self.sink.showDialog(text=text, m_type=m_type)
+
+    def closeWithWindow(self, window=None, msg: str | None = None, m_type: str = 'info') -> None:
+        """ Завершение вывода хода выполнения """
+
+        self.sink.closeWithWindow(window=window, msg=msg, m_type=m_type)
+
+    def close(self) -> None:
+        """ Скрытие вывода хода выполнения """
+
+        self.sink.close()
+
+
+PROGRESS = ProgressReporter()
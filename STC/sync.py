@@ -0,0 +1,204 @@
+""" Импорт данных в БД без интерфейса (например, ночью на сервере).
+
+    python -m STC.sync --plm --excel --td
+    python -m STC.sync --excel --dry-run --json
+    python -m STC.sync --plm --excel --td --full
+    python -m STC.sync --check-closure
+    python -m STC.sync --rebuild-closure
+
+    Файлы, не изменившиеся с прошлого импорта (по манифесту
+    импорта в БД), заново не считываются
+
+    Ошибки, при которых приложение показало бы диалоговое окно,
+    прерывают импорт и дают ненулевой код возврата.
+    Расхождения замыкания иерархии с таблицей hierarchy без
+    --rebuild-closure также дают ненулевой код возврата """
+
+from __future__ import annotations
+import argparse
+import json
+import logging
+
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from time import perf_counter
+
+from STC.database.database import DbConnection
+from STC.database.database import DbHierarchyClosure
+from STC.product.excel_import import ExcelDataFromTdDb
+from STC.product.excel_import import ExcelSync
+from STC.product.plm_import import PLMSync
+from STC.product.product import Connection
+from STC.progress.progress import PROGRESS
+from STC.progress.progress import LoggingSink
+from STC.progress.progress import StageTiming
+
+
+class SyncAborted(Exception):
+    """ Импорт прерван ошибкой, требующей решения пользователя """
+
+
+class HeadlessSink(LoggingSink):
+    """ Вывод хода импорта в лог. Сообщения об ошибках
+        (диалоги без типа и критические) прерывают импорт """
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+
+    def showDialog(self, text: str, m_type: str | None = None) -> None:
+        """ Предупреждения выводятся в лог, ошибки прерывают импорт """
+
+        if m_type in ('info', 'warning'):
+            super().showDialog(text=text, m_type=m_type)
+            return
+        raise SyncAborted(text.replace('\n', ' '))
+
+
+@dataclass
+class PipelineResult:
+    """ Результат импорта из одного источника """
+
+    name: str
+    seconds: float = 0.0
+    error: str = ''
+    stages: list[StageTiming] = field(default_factory=list)
+
+
+PIPELINES = {'plm': lambda args: PLMSync(full=args.full),
+             'excel': lambda args: ExcelSync(upd=args.update_hierarchy, full=args.full),
+             'td': lambda args: ExcelDataFromTdDb(full=args.full)}
+
+
+def run_pipeline(name: str, args: argparse.Namespace) -> PipelineResult:
+    """ Импорт из одного источника с замером времени этапов """
+
+    result = PipelineResult(name=name)
+    first_stage = len(PROGRESS.timings)
+    start = perf_counter()
+    try:
+        PIPELINES[name](args)
+    except Exception as error:  # pylint: disable=broad-except
+        logging.exception(f'Импорт {name} прерван')
+        result.error = f'{type(error).__name__}: {error}'
+        DbConnection.session.rollback()
+    result.seconds = perf_counter() - start
+    result.stages = PROGRESS.timings[first_stage:]
+    return result
+
+
+@dataclass
+class ClosureResult:
+    """ Результат обслуживания замыкания иерархии """
+
+    errors: int | None = None
+    rebuilt: bool = False
+
+
+def maintain_closure(args: argparse.Namespace) -> ClosureResult | None:
+    """ Сверка замыкания иерархии с таблицей hierarchy и его пересоздание """
+
+    if not args.check_closure and not args.rebuild_closure:
+        return None
+    result = ClosureResult()
+    if args.check_closure:
+        result.errors = len(DbHierarchyClosure.checkConsistency())
+    if args.rebuild_closure:
+        DbHierarchyClosure.rebuild()
+        result.rebuilt = True
+    return result
+
+
+def report(results: list[PipelineResult], changes: dict[tuple[str, str], int] | None,
+           closure: ClosureResult | None = None) -> str:
+    """ Отчет о времени этапов, замыкании иерархии и изменениях пробного запуска """
+
+    lines = []
+    for result in results:
+        status = result.error or 'завершен'
+        lines.append(f'[{result.name}] {result.seconds:.2f} с - {status}')
+        for timing in result.stages:
+            lines.append(f'    {timing.seconds:>9.2f} с  {timing.stage}')
+    if closure is not None:
+        if closure.errors is not None:
+            lines.append(f'Замыкание иерархии: расхождений {closure.errors}')
+        if closure.rebuilt:
+            lines.append('Замыкание иерархии пересоздано')
+    if changes is not None:
+        lines.append('Пробный запуск, изменения отменены:')
+        if not changes:
+            lines.append('    нет изменений')
+        for (table, operation), rows in sorted(changes.items()):
+            lines.append(f'    {table} {operation}: {rows}')
+    return '\n'.join(lines)
+
+
+def report_json(results: list[PipelineResult], changes: dict[tuple[str, str], int] | None,
+                closure: ClosureResult | None = None) -> str:
+    """ Отчет в формате JSON """
+
+    data = {'pipelines': [asdict(result) for result in results]}
+    if closure is not None:
+        data['closure'] = asdict(closure)
+    if changes is not None:
+        data['dry_run'] = [{'table': table, 'operation': operation, 'rows': rows}
+                           for (table, operation), rows in sorted(changes.items())]
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ Разбор аргументов командной строки и запуск импорта """
+
+    parser = argparse.ArgumentParser(
+        prog='python -m STC.sync',
+        description='Импорт данных в БД без интерфейса')
+    parser.add_argument('--plm', action='store_true',
+                        help='импорт xml выгрузок PLM')
+    parser.add_argument('--excel', action='store_true',
+                        help='импорт иерархических таблиц Excel')
+    parser.add_argument('--td', action='store_true',
+                        help='импорт журнала технологических документов')
+    parser.add_argument('--full', action='store_true',
+                        help='считать все источники заново, без манифеста импорта и кэша')
+    parser.add_argument('--update-hierarchy', action='store_true',
+                        help='обновить структуру изделий из таблиц Excel')
+    parser.add_argument('--check-closure', action='store_true',
+                        help='сверить замыкание иерархии с таблицей hierarchy')
+    parser.add_argument('--rebuild-closure', action='store_true',
+                        help='пересоздать замыкание иерархии по таблице hierarchy')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='отменить изменения и вывести количество измененных записей')
+    parser.add_argument('--json', action='store_true',
+                        help='отчет в формате JSON')
+    args = parser.parse_args(argv)
+    names = [name for name in PIPELINES if getattr(args, name)]
+    if not names and not args.check_closure and not args.rebuild_closure:
+        parser.error('не выбран ни один источник данных (--plm, --excel, --td) '
+                     'или команда замыкания иерархии (--check-closure, --rebuild-closure)')
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    PROGRESS.setSink(HeadlessSink())
+    try:
+        Connection(dry_run=args.dry_run)
+    except Exception:  # pylint: disable=broad-except
+        logging.exception('Не удалось подключиться к базе данных')
+        return 1
+
+    results = [run_pipeline(name=name, args=args) for name in names]
+    try:
+        closure = maintain_closure(args=args)
+    except Exception:  # pylint: disable=broad-except
+        logging.exception('Не удалось обработать замыкание иерархии')
+        DbConnection.session.rollback()
+        return 1
+    changes = DbConnection.endDryRun() if args.dry_run else None
+    output = report_json if args.json else report
+    print(output(results=results, changes=changes, closure=closure))
+    if closure is not None and closure.errors and not closure.rebuilt:
+        return 1
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,11 +1,57 @@
-""" Не используется """
+""" Фоновые потоки приложения """
+
+import logging
 
 from PyQt5.QtCore import QThread
+from PyQt5.QtCore import pyqtSignal
+from STC.database.database import DbConnection
+from STC.database.database import DbHierarchy
 from STC.product.document_from_form import DocumentFromForm
 from STC.product.product import Connection
 
 
+class ThreadHierarchyLoader(QThread):
+    """ Загрузка связей и документов иерархического древа изделия
+        в отдельной сессии БД. Ход загрузки передается сигналом progress,
+        загруженные данные (HierarchyData) - сигналом loaded.
+        Отмена - QThread.requestInterruption.
+        levels - количество загружаемых уровней древа (0 - все уровни) """
+
+    progress = pyqtSignal(str, int, int)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, id_product: int, reverse: bool = False, levels: int = 0) -> None:
+        super().__init__()
+        self.id_product = id_product
+        self.reverse = reverse
+        self.levels = levels
+        self.session = DbConnection.threadSession()
+
+    def run(self) -> None:
+        try:
+            data = DbHierarchy.loadHierarchy(session=self.session,
+                                             id_product=self.id_product,
+                                             reverse=self.reverse,
+                                             step=self.step,
+                                             levels=self.levels)
+        except Exception as error:  # pylint: disable=broad-except
+            logging.exception('Ошибка загрузки иерархии')
+            self.failed.emit(f'{type(error).__name__}: {error}')
+            return
+        finally:
+            self.session.close()
+        if data is not None:
+            self.loaded.emit(data)
+
+    def step(self, message: str, stage: int, stages: int) -> bool:
+        """ Передает ход загрузки, возвращает False при отмене """
+        self.progress.emit(message, stage, stages)
+        return not self.isInterruptionRequested()
+
+
 class ThreadDocumentFromForm(QThread):
+    """ Не используется """
 
     def __init__(self, window):
         super(ThreadDocumentFromForm, self).__init__()
@@ -7,12 +7,14 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtWidgets import QMessageBox
 
+from STC.config.config import CFG_DB
 from STC.config.config import CONFIG
 from STC.excel.xl_export.hierarchy import Excel
 from STC.excel.xl_export.document import ExcelDocumentCreator
 from STC.excel.xl_export.hierarchy import ExcelNorm
 from STC.excel.xl_export.hierarchy import ExcelNTD
 from STC.gui.splash_screen import SplashScreen
+from STC.gui.splash_screen import SplashScreenSink
 from STC.gui.splash_screen import show_dialog
 from STC.gui.style import StyleFactory
 from STC.gui.windows.config.window import WindowMkConfig
@@ -20,6 +22,7 @@ from STC.gui.windows.config.window import WindowProductConfig
 from STC.gui.windows.document_add_new.window import WindowNewDocument
 from STC.gui.windows.document_generator.window import WindowCreateMK
 from STC.gui.windows.document_generator.window import WindowSelectorMk
+from STC.gui.windows.hierarchy.loading import WindowHierarchyLoading
 from STC.gui.windows.hierarchy.window import WindowTable
 from STC.gui.windows.hierarchy_filter.model import StandartModelFilter
 from STC.gui.windows.hierarchy_filter.window import WindowFilter
@@ -34,6 +37,10 @@ from STC.product.plm_import import PLMSync
 from STC.product.product import Connection
 from STC.product.product import Product
 from STC.product.product import User
+from STC.progress.progress import PROGRESS
+from STC.database.database import DbConnection
+from STC.database.database import DbProduct
+from STC.database.database import HierarchyData
 from STC.database.test_data_generator import generate_test_data
 
 
@@ -52,6 +59,7 @@ class Controller:
         self.window_search_list = []
         self.window_filter_list = []
         self.table = None
+        self.loading = None
         self.product_selector_window = None
         self.__class__.connection = connection
         if self.__class__.connection is None:
@@ -126,15 +134,42 @@ class Controller:
                                product_denotation=product_denotation,
                                reverse=reverse)
 
+    def loadHierarchy(self, title: str, product_denotation: str, reverse: bool, loaded) -> None:
+        """ Загрузка иерархии изделия в фоновом потоке. По окончании
+            загрузки данные передаются в loaded. Незавершенная
+            предыдущая загрузка отменяется """
+
+        if self.loading is not None:
+            self.loading.cancelLoading()
+        db_product = DbProduct.getData(deno=product_denotation)
+        self.loading = WindowHierarchyLoading(title=title,
+                                              id_product=db_product.id_product,
+                                              reverse=reverse,
+                                              levels=CFG_DB.main.tree_levels)
+        self.loading.loaded.connect(loaded)
+        self.loading.show()
+
     def showMainTable(self, product_name=None, product_denotation=None, reverse=False) -> None:
-        """ Окно отображения таблицы иерархии состава изделия """
+        """ Окно отображения таблицы иерархии состава изделия.
+            Иерархия загружается в фоновом потоке """
+        self.loadHierarchy(title=f'Открытие таблицы {product_name} {product_denotation}',
+                           product_denotation=product_denotation,
+                           reverse=reverse,
+                           loaded=lambda data: self.openMainTable(product_name=product_name,
+                                                                  product_denotation=product_denotation,
+                                                                  reverse=reverse,
+                                                                  data=data))
+
+    def openMainTable(self, product_name: str, product_denotation: str,
+                      reverse: bool, data: HierarchyData) -> None:
+        """ Построение окна таблицы иерархии по загруженным данным """
         SplashScreen().newMessage(message=f'Открытие таблицы '
                                           f'{product_name} {product_denotation}',
                                   stage=0,
                                   stages=12,
                                   log=True,
                                   logging_level='INFO')
-        self.table = WindowTable(product_denotation=product_denotation, reverse=reverse)
+        self.table = WindowTable(product_denotation=product_denotation, reverse=reverse, data=data)
         self.windows.append(self.table)
         self.table.showWindowSearch.connect(self.showWindowSearch)
         self.table.showWindowFilter.connect(self.showWindowFilter)
@@ -191,6 +226,7 @@ class Controller:
     def showWindowDocumentSettings(self) -> None:
         """ Окно выбора свойств документа """
 
+        self.table.tree_view.fetchAll()
         self.window_document_settings = WindowDocumentSettings(tree_model=self.table.tree_view)
         self.windows.append(self.window_document_settings)
         self.window_document_settings.closeWindow.connect(self.deleteFromWindows)
@@ -285,11 +321,24 @@ class Controller:
             product.product_kind = self.table.current_context_menu_kind
 
     def updTreeView(self, load_from_db: bool = True) -> None:
-        """ Обновление иерархической таблицы """
+        """ Обновление иерархической таблицы.
+            Иерархия загружается в фоновом потоке """
 
         if load_from_db:
             self.__class__.connection.update()
-        self.table.updTreeModel(product_denotation=self.table.main_product.deno)
+        product = self.table.main_product
+        self.loadHierarchy(title=f'Обновление таблицы {product.name} {product.deno}',
+                           product_denotation=product.deno,
+                           reverse=self.table.reverse,
+                           loaded=self.updTreeModel)
+
+    def updTreeModel(self, data: HierarchyData) -> None:
+        """ Обновление иерархической таблицы и связанных
+            с ней окон по загруженным данным """
+
+        if self.table not in self.windows:
+            return
+        self.table.updTreeModel(product_denotation=self.table.main_product.deno, data=data)
         for window in self.window_search_list:
             self.findData(window)
         for window in self.window_filter_list:
@@ -438,6 +487,7 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     SplashScreen.app = app
+    PROGRESS.setSink(SplashScreenSink())
     StyleFactory(app=app)
 
     SplashScreen().newMessage(message='Инициализация списка изделий',
@@ -454,4 +504,5 @@ if __name__ == '__main__':
                               logging_level='INFO')
 
     controller = Controller(proj_start=True)
+    logging.info(DbConnection.loadReport())
     sys.exit(app.exec())